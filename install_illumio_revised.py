@@ -13,20 +13,111 @@ This script addresses the following requirements:
    - cluster_code: Pairing key for cluster
    - registry: Container registry to use
 """
+import functools
+import argparse
+import hashlib
 import os
+from stat import S_ISREG
 import subprocess
-import argparse
 import sys
 import json
-import tempfile
 import re
 import requests
 import urllib3
-import ruamel.yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from bin.illumio import ejvault
 from bin.illumio import ejconfig
 from bin.illumio import ejfile
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import orjson  # optional: faster encoding and decoding of PCE request bodies
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional: lets listings be scanned without parsing them whole
+except ImportError:
+    ijson = None
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Per-user cache for state that is expensive to rediscover on every run
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "illumio-cm")
+NAMESPACE_CACHE_FILE = os.path.join(CACHE_DIR, "ns.json")
+
+# Shared pool for independent blocking preflight calls (subprocesses, Vault)
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# How long cluster secrets read from Vault are reused within one process
+CLUSTER_SECRETS_TTL = 300
+_cluster_secrets_cache = {}
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_pce_secrets(env):
+    """Read the PCE API credentials from Vault once per environment."""
+    success, user, key = ejvault.get_pce_secrets(env)
+    if not success:
+        # Raising here means a failed lookup isn't cached
+        raise Exception("Could not retrieve API credentials from Vault")
+    return user, key
+
+
+def retrieve_cluster_secrets(cluster_name, env=None):
+    """
+    Retrieve cluster secrets from Vault, reusing a recent result for the same cluster.
+    
+    Only complete results are cached, so a cluster whose secrets haven't been
+    stored yet is looked up again on the next call.
+    
+    Args:
+        cluster_name (str): Name of the cluster
+        env (str): Environment (dev, test, stg, prod)
+        
+    Returns:
+        tuple: (container_cluster_id, container_cluster_token, pairing_key) or (None, None, None)
+    """
+    cache_key = (cluster_name, env)
+    cached = _cluster_secrets_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < CLUSTER_SECRETS_TTL:
+        return cached[1]
+    
+    secrets = ejvault.retrieve_cluster_secrets(cluster_name, env)
+    if all(secrets):
+        _cluster_secrets_cache[cache_key] = (time.monotonic(), secrets)
+    return secrets
+
+
+# Label values implied by the cluster naming convention: environment from
+# characters 2-5 (or character 5 on older names) and location from character 6
+_ENV_MAP3 = {"dev": "Development", "cln": "Clone", "uat": "Clone", "prd": "Production"}
+_ENV_MAP1 = {"d": "Development", "q": "Clone", "a": "Clone", "c": "Clone", "p": "Production"}
+_LOC_MAP = {"s": "Azure South Central US", "n": "Azure North Central US"}
+
+
+def normalize_label_restrictions(labels):
+    """Reduce profile label restrictions to a comparable set of (key, sorted hrefs)."""
+    return {
+        (label.get("key"), tuple(sorted(restriction["href"] for restriction in label.get("restriction", []))))
+        for label in labels
+    }
+
+
+def encode_json(obj):
+    """Serialize a request body, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+def decode_json(content):
+    """Parse a response body, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
 class IllumioClusterManager:
     def __init__(self, cluster_name, env=None):
@@ -38,103 +129,179 @@ class IllumioClusterManager:
         self.container_cluster_token = ""
         self.pairing_profile_id = ""
         self.pairing_key = ""
+        # Per-run cache of PCE listings: url -> (fetched_at, response)
+        self._cache = {}
+        self._labels_by_kv = {}
+        self._indexed_labels = None
+        # Last known state of container workload profiles read or written in this run
+        self._profile_cache = {}
         self.user, self.key = self.get_pce_secrets()
+        self.session = self.create_session()
         self.base_url = f"https://us-scp14.illum.io/api/v2/orgs/{self.org}"
 
     def get_pce_secrets(self):
-        success, user, key = ejvault.get_pce_secrets(self.env)
-        if not success:
-            raise Exception("Could not retrieve API credentials from Vault")
-        return user, key
+        return _cached_pce_secrets(self.env)
+
+    def create_session(self):
+        """
+        Build the HTTP session shared by all PCE calls so connections are reused.
+        
+        GET/PUT requests are retried with backoff on connection errors, throttling
+        and 5xx responses. POSTs are only retried if the connection was never
+        made, so a retry can't create a duplicate label, cluster or profile.
+        """
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "PUT"],
+            raise_on_status=False  # let raise_for_status() report the final response
+        )
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=retry))
+        session.auth = (self.user, self.key)
+        session.verify = False
+        # Ignore proxy environment variables...without this, requests try to go to Zscaler
+        session.trust_env = False
+        session.headers.update({
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        })
+        return session
 
     def get_requests(self, url):
-        headers = {'Content-Type': 'application/json'}
-        proxies = {'http': None, 'https': None}
-        auth = (self.user, self.key)
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        response = requests.get(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth)
+        response = self.session.get(url, timeout=15)
         response.raise_for_status()
-        return response.json()
+        return decode_json(response.content)
 
     def post_requests(self, url, data):
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
-        proxies = {'http': None, 'https': None}
-        auth = (self.user, self.key)
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        response = requests.post(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth, data=data)
+        """POST data (a JSON-serializable object) and return the parsed response."""
+        response = self.session.post(url, timeout=15, data=encode_json(data))
         if response.status_code == 406:
             print(f"Error creating resource. Response: {response.text}")
             raise Exception(f"Failed to create resource: {response.text}")
         response.raise_for_status()
-        return response.json()
+        return decode_json(response.content)
 
     def put_requests(self, url, data):
-        headers = {'Content-Type': 'application/json'}
-        proxies = {'http': None, 'https': None}
-        auth = (self.user, self.key)
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        response = requests.put(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth, data=data)
+        """PUT data (a JSON-serializable object) and return the parsed response, if any."""
+        response = self.session.put(url, timeout=15, data=encode_json(data))
         response.raise_for_status()
         # Return None for empty responses (204 No Content)
         if response.status_code == 204:
             return None
-        return response.json()
+        return decode_json(response.content)
+
+    def find_first(self, url, predicate):
+        """
+        Return the first object of a PCE listing that matches predicate, or None.
+        
+        With ijson installed the listing is parsed as it streams in and the scan
+        stops at the first match; otherwise the whole response is parsed.
+        """
+        if ijson is None:
+            return next((item for item in self.get_requests(url) if predicate(item)), None)
+        with self.session.get(url, timeout=15, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # let ijson see decompressed bytes
+            for item in ijson.items(response.raw, 'item'):
+                if predicate(item):
+                    return item
+        return None
+
+    def _cached_get(self, url, ttl=60):
+        """GET a listing, reusing a response fetched within the last ttl seconds."""
+        cached = self._cache.get(url)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        response = self.get_requests(url)
+        self._cache[url] = (time.monotonic(), response)
+        return response
+
+    def get_label_index(self):
+        """Return a (key, value) -> href index of the PCE labels, built from the cached listing."""
+        labels = self._cached_get(f"{self.base_url}/labels")
+        if labels is not self._indexed_labels:
+            self._labels_by_kv = {(label.get("key"), label.get("value")): label["href"] for label in labels}
+            self._indexed_labels = labels
+        return self._labels_by_kv
+
+    def get_profile(self, profile_details_url):
+        """Get a container workload profile, reusing the state last read or written in this run."""
+        profile = self._profile_cache.get(profile_details_url)
+        if profile is None:
+            profile = self.get_requests(profile_details_url)
+            self._profile_cache[profile_details_url] = profile
+        return profile
+
+    def update_profile(self, profile_details_url, update_data):
+        """PUT an update to a container workload profile and remember the resulting state."""
+        result = self.put_requests(profile_details_url, update_data)
+        profile = self._profile_cache.get(profile_details_url)
+        if profile is not None:
+            self._profile_cache[profile_details_url] = {**profile, **update_data}
+        return result
 
     def check_cluster_exists(self):
         """
         Check if cluster exists in PCE, or if pairing profile or vault secrets exist.
         Sets appropriate IDs if found and returns True if any exist.
         """
+        # Let the PCE filter by name so only matching objects come back. The name
+        # filter is a partial match, so find_first still checks the exact name.
+        name_filter = requests.utils.quote(self.cluster_name)
+        cluster_url = f"{self.base_url}/container_clusters?name={name_filter}"
+        pairing_url = f"{self.base_url}/pairing_profiles?name={name_filter}"
+        print(f"Checking if cluster {self.cluster_name} exists in PCE...")
+        
+        # The three lookups are independent, so fetch them concurrently and
+        # then process the results in order below
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            is_cluster = lambda item: item.get("name") == self.cluster_name
+            clusters_future = executor.submit(self.find_first, cluster_url, is_cluster)
+            pairing_future = executor.submit(self.find_first, pairing_url, is_cluster)
+            secrets_future = executor.submit(retrieve_cluster_secrets, self.cluster_name, self.env)
+        
         # Check if cluster exists in container_clusters
         cluster_exists = False
-        cluster_url = f"{self.base_url}/container_clusters"
-        print(f"Checking if cluster {self.cluster_name} exists in PCE...")
         try:
-            clusters = self.get_requests(cluster_url)
-            for cluster in clusters:
-                if cluster.get("name") == self.cluster_name:
-                    self.container_cluster_id = cluster["href"].split('/', 4)[-1]
-                    cluster_exists = True
-                    print(f"Found existing cluster {self.cluster_name} in PCE container clusters")
-                    print(f"Container cluster ID: {self.container_cluster_id}")
-                    
-                    # Also get the token if available
-                    self.container_cluster_token = cluster.get("container_cluster_token", "")
-                    if self.container_cluster_token:
-                        print("Retrieved container cluster token from PCE")
-                    break
+            cluster = clusters_future.result()
+            if cluster:
+                self.container_cluster_id = cluster["href"].rsplit('/', 1)[-1]
+                cluster_exists = True
+                print(f"Found existing cluster {self.cluster_name} in PCE container clusters")
+                print(f"Container cluster ID: {self.container_cluster_id}")
+                
+                # Also get the token if available
+                self.container_cluster_token = cluster.get("container_cluster_token", "")
+                if self.container_cluster_token:
+                    print("Retrieved container cluster token from PCE")
         except Exception as e:
             print(f"Error checking if cluster exists in PCE: {str(e)}")
         
         # Check if pairing profile exists
         pairing_exists = False
-        pairing_url = f"{self.base_url}/pairing_profiles"
         try:
-            pairing_profiles = self.get_requests(pairing_url)
-            for profile in pairing_profiles:
-                if profile.get("name") == self.cluster_name:
-                    self.pairing_profile_id = profile["href"].split('/', 4)[-1]
-                    pairing_exists = True
-                    print(f"Found existing pairing profile for {self.cluster_name}")
-                    
-                    # Try to get a pairing key for this profile if we don't have one
-                    if not self.pairing_key and self.pairing_profile_id:
-                        try:
-                            self.create_pairing_key()
-                        except Exception as e:
-                            print(f"Could not create pairing key: {str(e)}")
-                    break
+            profile = pairing_future.result()
+            if profile:
+                self.pairing_profile_id = profile["href"].rsplit('/', 1)[-1]
+                pairing_exists = True
+                print(f"Found existing pairing profile for {self.cluster_name}")
+                
+                # Try to get a pairing key for this profile if we don't have one
+                if not self.pairing_key and self.pairing_profile_id:
+                    try:
+                        self.create_pairing_key()
+                    except Exception as e:
+                        print(f"Could not create pairing key: {str(e)}")
         except Exception as e:
             print(f"Error checking for pairing profile: {str(e)}")
         
         # Check if vault secrets exist - prioritize these values if found
         secrets_exist = False
         try:
-            # Use the retrieve_cluster_secrets function from ejvault
-            container_cluster_id, container_cluster_token, pairing_key = ejvault.retrieve_cluster_secrets(self.cluster_name, self.env)
+            # Use the cached wrapper around ejvault.retrieve_cluster_secrets
+            container_cluster_id, container_cluster_token, pairing_key = secrets_future.result()
             if container_cluster_id:
                 self.container_cluster_id = container_cluster_id
                 secrets_exist = True
@@ -164,15 +331,14 @@ class IllumioClusterManager:
 
     def create_cluster_label(self):
         label_url = f"{self.base_url}/labels"
-        new_label = json.dumps({"key": "cluster", "value": self.cluster_name})
-        self.post_requests(label_url, new_label)
+        self.post_requests(label_url, {"key": "cluster", "value": self.cluster_name})
+        self._cache.pop(label_url, None)
         print(f"Cluster label {self.cluster_name.upper()} created.")
 
     def create_container_cluster(self):
         container_cluster_url = f"{self.base_url}/container_clusters"
-        new_cluster = json.dumps({"name": self.cluster_name})
-        cluster_details = self.post_requests(container_cluster_url, new_cluster)
-        self.container_cluster_id = cluster_details["href"].split('/', 4)[-1]
+        cluster_details = self.post_requests(container_cluster_url, {"name": self.cluster_name})
+        self.container_cluster_id = cluster_details["href"].rsplit('/', 1)[-1]
         self.container_cluster_token = cluster_details.get("container_cluster_token", "")
         print(f"Container Cluster {self.cluster_name.upper()} created.")
         return cluster_details
@@ -182,136 +348,97 @@ class IllumioClusterManager:
         Get all labels for the cluster to be used in pairing profile
         This includes cluster label, environment, location, role, etc.
         """
-        label_url = f"{self.base_url}/labels"
-        labels = self.get_requests(label_url)
+        label_index = self.get_label_index()
         label_hrefs = []
         
         # Get cluster label
-        for label in labels:
-            if label.get("key") == "cluster" and label.get("value") == self.cluster_name:
-                label_hrefs.append({"href": label["href"]})
+        cluster_label_href = label_index.get(("cluster", self.cluster_name))
+        if cluster_label_href:
+            label_hrefs.append({"href": cluster_label_href})
         
-        # Get environment label based on cluster name convention
-        target_env = self.cluster_name[2:5]
-        env_value = None
-        if target_env == "dev":
-            env_value = "Development"
-        elif target_env == "cln" or target_env == "uat":
-            env_value = "Clone"
-        elif target_env == "prd":
-            env_value = "Production"
-        else:
-            target_env = self.cluster_name[5:6]
-            if target_env == 'd':
-                env_value = "Development"
-            elif target_env == 'q' or target_env == 'a' or target_env == 'c':
-                env_value = "Clone"
-            elif target_env == 'p':
-                env_value = "Production"
+        # Add environment, location and cluster type labels
+        label_hrefs.extend(self.get_naming_convention_labels())
+        return label_hrefs
+
+    def get_naming_convention_labels(self):
+        """
+        Get the env, loc, app and role labels implied by the cluster name.
         
-        # Get location label based on cluster name convention
-        target_location = self.cluster_name[6:7]
-        location_value = None
-        if target_location == 's':
-            location_value = "Azure South Central US"
-        elif target_location == 'n':
-            location_value = "Azure North Central US"
-        else:
-            location_value = "Azure Central US"
+        Returns:
+            list: {"href": ...} references for the labels that exist in the PCE,
+            in env, loc, app, role order
+        """
+        name = self.cluster_name
+        # Single characters are compared by index; only the 3-character key needs a slice
+        env_value = _ENV_MAP3.get(name[2:5])
+        if env_value is None and len(name) > 5:
+            env_value = _ENV_MAP1.get(name[5])
+        location_value = _LOC_MAP.get(name[6], "Azure Central US") if len(name) > 6 else "Azure Central US"
+        cluster_type = "mulesoft" if "gtw" in name else "general"
         
-        # Get cluster type label
-        cluster_type = "general"
-        if "gtw" in self.cluster_name:
-            cluster_type = "mulesoft"
+        label_index = self.get_label_index()
+        wanted = [("env", env_value), ("loc", location_value), ("app", cluster_type), ("role", "Cluster Node")]
+        return [{"href": label_index[kv]} for kv in wanted if kv in label_index]
+
+    def assign_namespace_labels(self, item, label_index):
+        """
+        Assign namespace labels to container workload profiles.
         
-        # Add environment, location and cluster type labels
-        for label in labels:
-            if env_value and label.get("key") == "env" and label.get("value") == env_value:
-                label_hrefs.append({"href": label["href"]})
-            elif location_value and label.get("key") == "loc" and label.get("value") == location_value:
-                label_hrefs.append({"href": label["href"]})
-            elif label.get("key") == "app" and label.get("value") == cluster_type:
-                label_hrefs.append({"href": label["href"]})
-            elif label.get("key") == "role" and label.get("value") in ["Cluster Node"]:
-                label_hrefs.append({"href": label["href"]})
+        Safe to run for several profiles at once: the profile ID is kept local
+        rather than stored on the manager.
         
-        return label_hrefs
-
-    def assign_namespace_labels(self, item, label_answer_json):
-        """Assign namespace labels to container workload profiles"""
+        Args:
+            item (dict): Container workload profile from the PCE listing
+            label_index (dict): (key, value) -> href index of the PCE labels
+        """
         profile_href = item["href"]
-        self.container_workload_profile_id = profile_href.split('/', 6)[-1]
-        profile_details_url = f"{self.base_url}/container_clusters/{self.container_cluster_id}/container_workload_profiles/{self.container_workload_profile_id}"
+        profile_id = profile_href.rsplit('/', 1)[-1]
+        profile_details_url = f"{self.base_url}/container_clusters/{self.container_cluster_id}/container_workload_profiles/{profile_id}"
         namespace = item["namespace"]
 
         print(f"Processing namespace label for namespace: {namespace}")
         
         # First get the current state of the container workload profile
         try:
-            current_profile = self.get_requests(profile_details_url)
+            current_profile = self.get_profile(profile_details_url)
             print(f"Current profile: {json.dumps(current_profile, indent=2)}")
             
             # Find the namespace label in available labels
-            namespace_label_href = None
-            for label in label_answer_json:
-                if label.get("key") == "namespace" and label.get("value") == namespace:
-                    namespace_label_href = label["href"]
-                    print(f"Found namespace label {namespace} with href {namespace_label_href}")
-                    break
-            
-            if not namespace_label_href:
+            namespace_label_href = label_index.get(("namespace", namespace))
+            if namespace_label_href:
+                print(f"Found namespace label {namespace} with href {namespace_label_href}")
+            else:
                 # Create the namespace label if it doesn't exist
                 print(f"Creating namespace label for {namespace}")
                 namespace_label = self.create_namespace_label(namespace)
                 namespace_label_href = namespace_label["href"]
             
-            # Construct the update
-            # Use a minimal update approach - only set enforcement_mode and managed status first
-            update_data = {
-                "managed": True,
-                "enforcement_mode": "visibility_only"
-            }
-            
-            # Apply the update in stages - first set managed status
-            print(f"Setting profile to managed with: {json.dumps(update_data)}")
-            self.put_requests(profile_details_url, json.dumps(update_data))
-            
-            # Now get the profile again after the first update
-            current_profile = self.get_requests(profile_details_url)
-            
-            # Create a new update with assign_labels
-            assign_labels = []
+            # Set the profile to managed and assign the label in a single update,
+            # sending only what isn't already in place
+            update_data = {}
+            if not current_profile.get("managed", False) or current_profile.get("enforcement_mode") != "visibility_only":
+                update_data["managed"] = True
+                update_data["enforcement_mode"] = "visibility_only"
             
-            # Keep any existing labels that don't conflict
-            if "assign_labels" in current_profile and isinstance(current_profile["assign_labels"], list):
-                # Check if the namespace label is already assigned
-                namespace_already_assigned = False
-                for label in current_profile["assign_labels"]:
-                    if label.get("href") == namespace_label_href:
-                        namespace_already_assigned = True
-                        print(f"Namespace label already assigned for {namespace}")
-                        break
-                
-                # If not already assigned, add it to existing labels
-                if not namespace_already_assigned:
-                    assign_labels = current_profile["assign_labels"].copy()
-                    assign_labels.append({"href": namespace_label_href})
-                else:
-                    # Already assigned, nothing to do
-                    print(f"Namespace label for {namespace} already assigned, no update needed")
-                    return
+            # Keep any existing labels, adding the namespace label if it isn't there yet
+            assign_labels = current_profile.get("assign_labels")
+            if not isinstance(assign_labels, list):
+                assign_labels = []
+            namespace_already_assigned = any(label.get("href") == namespace_label_href for label in assign_labels)
+            if namespace_already_assigned:
+                print(f"Namespace label already assigned for {namespace}")
             else:
-                # No existing labels, just add the namespace label
-                assign_labels = [{"href": namespace_label_href}]
+                update_data["assign_labels"] = assign_labels + [{"href": namespace_label_href}]
             
-            # Create a new update with just assign_labels
-            update_data = {"assign_labels": assign_labels}
+            if not update_data:
+                print(f"Namespace label for {namespace} already assigned, no update needed")
+                return
             
-            # Apply the second update with assign_labels
-            print(f"Assigning namespace label with: {json.dumps(update_data)}")
-            result = self.put_requests(profile_details_url, json.dumps(update_data))
+            print(f"Updating profile with: {json.dumps(update_data)}")
+            result = self.update_profile(profile_details_url, update_data)
             print(f"Label assignment result: {result}")
-            print(f"Successfully assigned namespace label {namespace} to profile")
+            if not namespace_already_assigned:
+                print(f"Successfully assigned namespace label {namespace} to profile")
             
         except Exception as e:
             print(f"Error assigning namespace label: {str(e)}")
@@ -321,16 +448,43 @@ class IllumioClusterManager:
     def create_namespace_label(self, namespace):
         """Create a namespace label"""
         label_url = f"{self.base_url}/labels"
-        new_label = json.dumps({"key": "namespace", "value": namespace})
-        print(f"Creating new namespace label with data: {new_label}")
+        new_label = {"key": "namespace", "value": namespace}
+        print(f"Creating new namespace label with data: {json.dumps(new_label)}")
         try:
             new_label_response = self.post_requests(label_url, new_label)
+            self._cache.pop(label_url, None)
             print(f"Created new namespace label: {json.dumps(new_label_response, indent=2)}")
             return new_label_response
         except Exception as e:
             print(f"Error creating namespace label: {str(e)}")
             raise
 
+    def create_namespace_labels(self, namespaces):
+        """
+        Create the namespace labels that don't exist yet, in parallel.
+        
+        Args:
+            namespaces (list): Namespace names that need a label
+            
+        Returns:
+            list: The labels that were created; failures are reported and skipped
+        """
+        label_index = self.get_label_index()
+        missing = sorted({namespace for namespace in namespaces if ("namespace", namespace) not in label_index})
+        if not missing:
+            return []
+        
+        def create(namespace):
+            try:
+                return self.create_namespace_label(namespace)
+            except Exception:
+                return None  # already reported by create_namespace_label
+        
+        print(f"Creating {len(missing)} missing namespace labels")
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as executor:
+            created = list(executor.map(create, missing))
+        return [label for label in created if label]
+
     def create_assign_namespace_label(self, namespace, profile_details_url):
         """Create and assign a namespace label to a container workload profile"""
         try:
@@ -338,31 +492,18 @@ class IllumioClusterManager:
             new_label_response = self.create_namespace_label(namespace)
             new_label_href = new_label_response["href"]
             
-            # First get the current profile to ensure we have the latest state
-            current_profile = self.get_requests(profile_details_url)
+            # Get the current profile so existing assigned labels are kept
+            current_profile = self.get_profile(profile_details_url)
+            assigned_labels = current_profile.get("assign_labels", [])
             
-            # Set the profile to managed first
+            # Set the profile to managed and add the new label in a single update
             update_data = {
                 "managed": True,
-                "enforcement_mode": "visibility_only"
+                "enforcement_mode": "visibility_only",
+                "assign_labels": assigned_labels + [{"href": new_label_href}]
             }
-            print(f"Setting profile to managed with: {json.dumps(update_data)}")
-            self.put_requests(profile_details_url, json.dumps(update_data))
-            
-            # Now get the profile again
-            current_profile = self.get_requests(profile_details_url)
-            assigned_labels = current_profile.get("assign_labels", [])
-            
-            # Add the new label to any existing assigned labels
-            new_assigned_labels = assigned_labels.copy()
-            new_assigned_labels.append({"href": new_label_href})
-            
-            # Format the request properly - just assign_labels
-            label_update = json.dumps({"assign_labels": new_assigned_labels})
-            print(f"Updating profile with assign_labels: {label_update}")
-            
-            # Make the PUT request
-            result = self.put_requests(profile_details_url, label_update)
+            print(f"Updating profile with: {json.dumps(update_data)}")
+            result = self.update_profile(profile_details_url, update_data)
             print(f"Label assignment result: {result}")
             print(f"Namespace label created and assigned to {namespace.upper()} profile in cluster {self.cluster_name.upper()}")
         except Exception as e:
@@ -373,34 +514,31 @@ class IllumioClusterManager:
     def assign_default_labels(self, item):
         """Assign default labels to container workload profiles"""
         profile_href = item["href"]
-        self.container_workload_profile_id = profile_href.split('/', 6)[-1]
+        self.container_workload_profile_id = profile_href.rsplit('/', 1)[-1]
         profile_details_url = f"{self.base_url}/container_clusters/{self.container_cluster_id}/container_workload_profiles/{self.container_workload_profile_id}"
         
         print(f"Processing default labels for profile: {self.container_workload_profile_id}")
         
         try:
             # Get current profile state
-            profile = self.get_requests(profile_details_url)
+            profile = self.get_profile(profile_details_url)
             print(f"Current profile state: {json.dumps(profile, indent=2)}")
             
+            # All changes below are collected into a single update of the profile
+            update_data = {}
+            
             # First step: Set the profile to managed with visibility_only enforcement
             if not profile.get("managed", False) or profile.get("enforcement_mode") != "visibility_only":
-                update_data = {
-                    "managed": True,
-                    "enforcement_mode": "visibility_only"
-                }
                 print(f"Setting profile to MANAGED and enforcement mode to VISIBILITY ONLY")
-                self.put_requests(profile_details_url, json.dumps(update_data))
-                print("Profile set to managed state successfully")
-                
-                # Get updated profile
-                profile = self.get_requests(profile_details_url)
+                update_data["managed"] = True
+                update_data["enforcement_mode"] = "visibility_only"
             else:
                 print("Profile already in managed state with visibility_only enforcement")
             
             # Second step: Get all available labels
             label_url = f"{self.base_url}/labels"
-            label_answer = self.get_requests(label_url)
+            label_answer = self._cached_get(label_url)
+            label_index = self.get_label_index()
             
             # Prepare default labels to assign
             labels = []
@@ -428,102 +566,54 @@ class IllumioClusterManager:
             
             # Update profile with the label restrictions
             if labels:
-                label_update = json.dumps({"labels": labels})
-                print(f"Updating profile with default label restrictions: {label_update}")
-                result = self.put_requests(profile_details_url, json.dumps({"labels": labels}))
-                print(f"Default labels assigned to Container Workload Profile in cluster {self.cluster_name.upper()}")
-                print(f"Label assignment result: {result}")
+                if normalize_label_restrictions(profile.get("labels") or []) == normalize_label_restrictions(labels):
+                    print("Default label restrictions already up-to-date")
+                else:
+                    print(f"Updating profile with default label restrictions: {json.dumps({'labels': labels})}")
+                    update_data["labels"] = labels
             else:
                 print("No default labels found to assign")
             
             # Third step: Add container annotation labels
             # Get the cluster labels for the cluster
             cluster_labels = []
-            for label in label_answer:
-                if label.get("key") == "cluster" and label.get("value") == self.cluster_name:
-                    cluster_labels.append({"href": label["href"]})
-            
-            # Get environment label based on cluster name convention
-            target_env = self.cluster_name[2:5]
-            env_value = None
-            if target_env == "dev":
-                env_value = "Development"
-            elif target_env == "cln" or target_env == "uat":
-                env_value = "Clone"
-            elif target_env == "prd":
-                env_value = "Production"
-            else:
-                target_env = self.cluster_name[5:6]
-                if target_env == 'd':
-                    env_value = "Development"
-                elif target_env == 'q' or target_env == 'a' or target_env == 'c':
-                    env_value = "Clone"
-                elif target_env == 'p':
-                    env_value = "Production"
-            
-            # Get location label based on cluster name convention
-            target_location = self.cluster_name[6:7]
-            location_value = None
-            if target_location == 's':
-                location_value = "Azure South Central US"
-            elif target_location == 'n':
-                location_value = "Azure North Central US"
-            else:
-                location_value = "Azure Central US"
-            
-            # Get cluster type label
-            cluster_type = "general"
-            if "gtw" in self.cluster_name:
-                cluster_type = "mulesoft"
-            
-            # Find the environment, location, and app labels
-            env_label = None
-            loc_label = None
-            app_label = None
-            role_label = None
+            cluster_label_href = label_index.get(("cluster", self.cluster_name))
+            if cluster_label_href:
+                cluster_labels.append({"href": cluster_label_href})
             
-            for label in label_answer:
-                if env_value and label.get("key") == "env" and label.get("value") == env_value:
-                    env_label = {"href": label["href"]}
-                elif location_value and label.get("key") == "loc" and label.get("value") == location_value:
-                    loc_label = {"href": label["href"]}
-                elif label.get("key") == "app" and label.get("value") == cluster_type:
-                    app_label = {"href": label["href"]}
-                elif label.get("key") == "role" and label.get("value") in ["Cluster Node"]:
-                    role_label = {"href": label["href"]}
-            
-            # Compile the assign_labels with the found labels
-            assign_labels = []
-            if env_label:
-                assign_labels.append(env_label)
-            if loc_label:
-                assign_labels.append(loc_label)
-            if app_label:
-                assign_labels.append(app_label)
-            if role_label:
-                assign_labels.append(role_label)
+            # Compile the assign_labels: env, loc, app and role, then the cluster label
+            assign_labels = self.get_naming_convention_labels()
             if cluster_labels:
                 assign_labels.extend(cluster_labels)
             
             # If we have labels to assign, update the profile
             if assign_labels:
-                # Get the current assign_labels to avoid overwriting
-                current_profile = self.get_requests(profile_details_url)
-                current_assign_labels = current_profile.get("assign_labels", [])
+                # Keep the current assign_labels to avoid overwriting
+                current_assign_labels = list(profile.get("assign_labels") or [])
+                assigned_hrefs = {label.get("href") for label in current_assign_labels}
                 
                 # Merge existing labels with new ones, avoiding duplicates
-                for label in assign_labels:
-                    if label not in current_assign_labels:
-                        current_assign_labels.append(label)
-                
-                # Update the profile with the merged labels
-                assign_update = json.dumps({"assign_labels": current_assign_labels})
-                print(f"Updating profile with assign_labels: {assign_update}")
-                result = self.put_requests(profile_details_url, assign_update)
-                print(f"Container annotation labels assigned to Container Workload Profile")
-                print(f"Label assignment result: {result}")
+                missing_labels = [label for label in assign_labels if label["href"] not in assigned_hrefs]
+                if missing_labels:
+                    current_assign_labels.extend(missing_labels)
+                    print(f"Updating profile with assign_labels: {json.dumps({'assign_labels': current_assign_labels})}")
+                    update_data["assign_labels"] = current_assign_labels
+                else:
+                    print("Container annotation labels already assigned")
             else:
                 print("No container annotation labels found to assign")
+            
+            # Apply managed state, label restrictions and assigned labels in one PUT,
+            # skipping the write entirely if the profile is already up-to-date
+            if not update_data:
+                print("Container Workload Profile already up-to-date, no update needed")
+            else:
+                result = self.update_profile(profile_details_url, update_data)
+                if "labels" in update_data:
+                    print(f"Default labels assigned to Container Workload Profile in cluster {self.cluster_name.upper()}")
+                if "assign_labels" in update_data:
+                    print(f"Container annotation labels assigned to Container Workload Profile")
+                print(f"Label assignment result: {result}")
                 
         except Exception as e:
             print(f"Warning: Could not assign default labels: {str(e)}")
@@ -531,18 +621,11 @@ class IllumioClusterManager:
 
     def get_cluster_labels(self):
         """Get labels for the cluster to be used in pairing profile"""
-        label_url = f"{self.base_url}/labels"
-        labels = self.get_requests(label_url)
-        cluster_label_href = ""
-        for label in labels:
-            if label.get("key") == "cluster" and label.get("value") == self.cluster_name:
-                cluster_label_href = label["href"]
-                break
-        
+        cluster_label_href = self.get_label_index().get(("cluster", self.cluster_name))
         if not cluster_label_href:
-            return ""
+            return None
         
-        return json.dumps({"href": cluster_label_href})
+        return {"href": cluster_label_href}
 
     def create_pairing_profile(self):
         """Create a pairing profile for the cluster"""
@@ -554,7 +637,7 @@ class IllumioClusterManager:
         # If no labels were found, use just the cluster label
         if not labels:
             cluster_label = self.get_cluster_labels()
-            labels = [json.loads(cluster_label)] if cluster_label else []
+            labels = [cluster_label] if cluster_label else []
         
         # Ensure labels are properly formatted
         formatted_labels = []
@@ -584,8 +667,8 @@ class IllumioClusterManager:
         }
         
         try:
-            pairing_profile_details = self.post_requests(pairing_profile_url, json.dumps(pairing_profile_data))
-            self.pairing_profile_id = pairing_profile_details["href"].split('/', 4)[-1]
+            pairing_profile_details = self.post_requests(pairing_profile_url, pairing_profile_data)
+            self.pairing_profile_id = pairing_profile_details["href"].rsplit('/', 1)[-1]
             print(f"Pairing Profile {self.cluster_name.upper()} created.")
             return pairing_profile_details
         except Exception as e:
@@ -598,8 +681,7 @@ class IllumioClusterManager:
             raise Exception("Pairing profile ID is required to create a pairing key")
             
         key_gen_url = f"{self.base_url}/pairing_profiles/{self.pairing_profile_id}/pairing_key"
-        data = '{}'
-        pairing_key_details = self.post_requests(key_gen_url, data)
+        pairing_key_details = self.post_requests(key_gen_url, {})
         self.pairing_key = pairing_key_details.get("activation_code", "")
         print(f"Pairing key for {self.cluster_name.upper()} created.")
         return pairing_key_details
@@ -616,6 +698,11 @@ class IllumioClusterManager:
             )
             if not success:
                 raise Exception("Failed to store secrets in vault")
+            # The install step reads these back, so keep them for this process
+            _cluster_secrets_cache[(self.cluster_name, self.env)] = (
+                time.monotonic(),
+                (self.container_cluster_id, self.container_cluster_token, self.pairing_key)
+            )
             print(f"Successfully stored secrets in vault for {self.cluster_name}")
             return True
         except Exception as e:
@@ -686,9 +773,9 @@ def validate_helm_chart(chart_path):
         process = subprocess.run(
             ["helm", "lint", chart_path],
             check=False,  # Don't fail if linting has warnings
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True  # Use this instead of text=True for Python 3.6
+            capture_output=True,
+            text=True,
+            timeout=120
         )
        
         # Check if there are any errors (as opposed to warnings)
@@ -706,38 +793,37 @@ def validate_helm_chart(chart_path):
         return False
  
 def docker_command(cmd):
-    """Run a docker command and handle errors."""
+    """
+    Run a docker command and handle errors.
+    
+    Returns:
+        bool: True if the command succeeded, False otherwise
+    """
     try:
         print(f"Executing: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True)
+        # Progress output isn't needed; stderr is kept for the error message
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        return True
     except subprocess.CalledProcessError as e:
         print(f"Error executing command: {e}")
+        if e.stderr:
+            print(e.stderr.strip())
+        return False
  
-def process_images(values_file, new_registry):
-    """Reads values.yaml, pulls images, retags them, and pushes to the new registry."""
-    yaml = ruamel.yaml.YAML(typ="safe")  # Use safe mode to preserve structure
- 
-    # Read values.yaml
-    with open(values_file, 'r') as file:
-        values = yaml.load(file)
- 
-    if not values:
-        print("Error: values.yaml is empty or invalid.")
-        return
- 
-    # Recursive function to process images in nested structures
+def process_images(values, new_registry):
+    """Pulls the images referenced by parsed values.yaml data, retags them, and pushes to the new registry."""
+    # Collect each distinct image once; subcharts often reference the same one
+    images = []
+    seen = set()
+    
+    # Recursive function to find images in nested structures
     def process_entries(obj):
         if isinstance(obj, dict):
             if all(key in obj for key in ["registry", "repo", "imageTag"]):
-                old_image = f"{obj['registry']}/{obj['repo']}:{obj['imageTag']}"
-                new_image = f"{new_registry}/{obj['repo']}:{obj['imageTag']}"
- 
-                print(f"\nProcessing Image: {old_image} → {new_image}")
- 
-                # Pull, Tag, and Push the image
-                docker_command(["docker", "pull", old_image])
-                docker_command(["docker", "tag", old_image, new_image])
-                docker_command(["docker", "push", new_image])
+                image = (obj['registry'], obj['repo'], obj['imageTag'])
+                if image not in seen:
+                    seen.add(image)
+                    images.append(image)
  
             # Process nested dictionaries
             for key in obj:
@@ -747,47 +833,181 @@ def process_images(values_file, new_registry):
                 process_entries(item)
  
     process_entries(values)
+    if not images:
+        return
+    
+    pairs = []
+    for registry, repo, image_tag in images:
+        old_image = f"{registry}/{repo}:{image_tag}"
+        new_image = f"{new_registry}/{repo}:{image_tag}"
+        print(f"\nProcessing Image: {old_image} → {new_image}")
+        pairs.append((old_image, new_image))
+    
+    # Pulls and pushes are independent network transfers, so run them in
+    # parallel; tagging is local and cheap, so do it in between
+    with ThreadPoolExecutor(max_workers=min(8, len(pairs))) as executor:
+        pulled = list(executor.map(lambda pair: docker_command(["docker", "pull", pair[0]]), pairs))
+        to_push = []
+        for (old_image, new_image), ok in zip(pairs, pulled):
+            if ok and docker_command(["docker", "tag", old_image, new_image]):
+                to_push.append(new_image)
+        list(executor.map(lambda image: docker_command(["docker", "push", image]), to_push))
+ 
+# Registry part of an image reference: everything before the first '/'
+REGISTRY_RE = re.compile(r'^[^/]+')
  
-def update_registry_names(file_path, new_registry):
+def update_registry_names(values, new_registry):
+    """
+    Updates only the registry name in all occurrences within parsed values.yaml data.
+    
+    Returns:
+        int: Number of values that were changed
     """
-    Updates only the registry name in all occurrences within the values.yaml file.
+    changed = 0
+    # Walk the nested structure with an explicit stack rather than recursion,
+    # so deeply nested values can't hit the recursion limit
+    stack = [values]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                if isinstance(value, str) and "/" in value:
+                    # Replace only the registry part before the first '/'
+                    updated = REGISTRY_RE.sub(new_registry, value, count=1)
+                    if updated != value:
+                        obj[key] = updated
+                        changed += 1
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return changed
+ 
+def values_cache_path(values_file):
+    """Path of the parsed-values cache for a values.yaml file."""
+    key = hashlib.sha1(os.path.abspath(values_file).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f"values-{key}.pkl")
+ 
+def load_cached_values(values_file, file):
+    """
+    Load values parsed on a previous run, if values.yaml hasn't changed since.
+    
+    Args:
+        values_file (str): Path to values.yaml file
+        file (file): Open handle on values_file
+        
+    Returns:
+        The parsed values, or None if there is no usable cache entry
+    """
+    import pickle
+    stat = os.fstat(file.fileno())
+    try:
+        with open(values_cache_path(values_file), 'rb') as cache:
+            if pickle.load(cache) != (stat.st_mtime_ns, stat.st_size):
+                return None
+            return pickle.load(cache)
+    except Exception:
+        # Missing, stale-format or truncated cache: just parse the file
+        return None
  
+def save_cached_values(values_file, file, values):
+    """
+    Cache parsed values, tagged with the mtime and size of the file they match.
+    
+    Args:
+        values_file (str): Path to values.yaml file
+        file (file): Open handle on values_file, flushed after any write
+        values: Parsed values matching the current contents of values_file
     """
+    import pickle
+    stat = os.fstat(file.fileno())
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(values_cache_path(values_file), 'wb') as cache:
+            pickle.dump((stat.st_mtime_ns, stat.st_size), cache, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(values, cache, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"Warning: Could not write values cache: {str(e)}")
+ 
+@functools.lru_cache(maxsize=None)
+def round_trip_yaml():
+    """Build the round-trip YAML parser once; it keeps quotes, comments and indentation."""
+    import ruamel.yaml  # deferred: only the install path needs a YAML parser
     yaml = ruamel.yaml.YAML()
     yaml.preserve_quotes = True
     yaml.indent(mapping=2, sequence=4, offset=2)
+    return yaml
  
+def open_values(values_file):
+    """
+    Open values.yaml for update and parse it.
+    
+    Runs before any PCE/Vault changes are made, so a missing or unreadable
+    values file stops the script while nothing has been created yet.
+    
+    Args:
+        values_file (str): Path to values.yaml file
+        
+    Returns:
+        tuple: (open file handle, parsed values); values is None if the file is empty or invalid
+    """
     try:
-        # Read the existing values.yaml file
-        with open(file_path, 'r') as file:
-            values = yaml.load(file)
- 
+        file = open(values_file, 'r+')
+    except OSError as e:
+        print(f"Error: Could not open values file {values_file}: {e.strerror}")
+        sys.exit(1)
+    
+    try:
+        values = load_cached_values(values_file, file)
         if values is None:
-            raise ValueError("The values.yaml file is empty or invalid.")
+            values = round_trip_yaml().load(file)
+    except Exception as e:
+        file.close()
+        print(f"Error: Could not parse values file {values_file}: {e}")
+        sys.exit(1)
+    if not values:
+        print("Error: values.yaml is empty or invalid.")
+        file.close()
+        return None, None
+    return file, values
  
-        # Recursive function to update registry values
-        def update_registry(obj):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    if isinstance(value, str) and "/" in value:
-                        # Replace only the registry part before the first '/'
-                        obj[key] = re.sub(r'^[^/]+', new_registry, value, count=1)
-                    elif isinstance(value, (dict, list)):
-                        update_registry(value)
-            elif isinstance(obj, list):
-                for i in range(len(obj)):
-                    update_registry(obj[i])
+def rewrite_values(values_file, registry, file, values):
+    """
+    Mirror the chart images to the registry and point values.yaml at it.
+    
+    The file is opened and parsed once by open_values: the same open handle
+    feeds both the image and registry passes and is rewritten in place, so
+    nothing can change the file between the steps.
+    
+    Args:
+        values_file (str): Path to values.yaml file
+        registry (str): Container registry
+        file (file): Handle on values_file returned by open_values, closed here
+        values: Parsed values returned by open_values
+    """
+    yaml = round_trip_yaml()
+    
+    print(f"=== Processing images for registry: {registry} ===")
+    with file:
+        process_images(values, registry)
  
-        # Update registry values
-        update_registry(values)
+        try:
+            if not update_registry_names(values, registry):
+                # Nothing to rewrite (e.g. a re-run against the same registry)
+                print(f"Registry in {values_file} already up-to-date.")
+                save_cached_values(values_file, file, values)
+                return
  
-        # Write back to values.yaml without sorting, keeping comments & formatting
-        with open(file_path, 'w') as file:
+            # Write back to values.yaml without sorting, keeping comments & formatting
+            file.seek(0)
+            file.truncate()
             yaml.dump(values, file)
+            file.flush()
+            save_cached_values(values_file, file, values)
  
-        print(f"Updated registry in {file_path} successfully.")
-    except Exception as e:
-        print(f"Error updating values.yaml: {e}")
+            print(f"Updated registry in {values_file} successfully.")
+        except Exception as e:
+            print(f"Error updating values.yaml: {e}")
  
 def cleanup_failed_installation(release_name, namespace):
     """
@@ -806,10 +1026,10 @@ def cleanup_failed_installation(release_name, namespace):
         # Check if release exists and is in failed state
         status_check = subprocess.run(
             ["helm", "status", release_name, "-n", namespace],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            capture_output=True,
+            text=True,
             check=False,
-            universal_newlines=True
+            timeout=10
         )
         
         # If status command succeeds, we need to uninstall
@@ -824,9 +1044,9 @@ def cleanup_failed_installation(release_name, namespace):
             uninstall_process = subprocess.run(
                 uninstall_cmd,
                 check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
+                capture_output=True,
+                text=True,
+                timeout=300
             )
             print(f"Successfully cleaned up failed release '{release_name}'")
         else:
@@ -842,27 +1062,263 @@ def cleanup_failed_installation(release_name, namespace):
                 uninstall_process = subprocess.run(
                     uninstall_cmd,
                     check=False,  # Don't fail if uninstall fails
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True
+                    capture_output=True,
+                    text=True,
+                    timeout=60
                 )
                 print(f"Attempted force cleanup of release '{release_name}'")
             except Exception as e:
                 print(f"Warning: Force cleanup attempt failed: {str(e)}")
         
-        # Give Kubernetes some time to clean up resources
+        # Wait until the release's resources are gone, probing with a growing
+        # interval; after `helm uninstall --wait` the first probe is usually empty
         print("Waiting for Kubernetes to clean up resources...")
-        time.sleep(10)
+        deadline = time.monotonic() + 30
+        interval = 0.25
+        while True:
+            try:
+                remaining = subprocess.run(
+                    ["kubectl", "get", "all", "-n", namespace,
+                     "-l", f"app.kubernetes.io/instance={release_name}", "-o", "name"],
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                    timeout=10
+                )
+            except subprocess.TimeoutExpired:
+                remaining = None
+            if remaining and remaining.returncode == 0 and not remaining.stdout.strip():
+                print("Release resources cleaned up")
+                break
+            if time.monotonic() + interval > deadline:
+                print("Warning: Release resources still present after 30s, continuing anyway")
+                break
+            time.sleep(interval)
+            interval = min(interval * 2, 2)
         return True
         
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
         return False
 
-def install_illumio_helm_chart(cluster_name, chart_path='./Illumio/', namespace='illumio-system',
-                              values_file='values.yaml', release_name='illumio',
-                              registry='registry.access.redhat.com/ubi9',
-                              create_namespace=False, debug=False, max_retries=3, env=None):
+def namespace_cache_key(namespace):
+    """
+    Build the namespace cache key for the current kubeconfig.
+    
+    The key hashes the kubeconfig contents (and so its current-context) together
+    with the namespace name, so switching clusters never reuses a stale entry.
+    
+    Args:
+        namespace (str): Kubernetes namespace
+        
+    Returns:
+        str: Cache key, or None if no kubeconfig could be read (e.g. in-cluster)
+    """
+    kubeconfig = os.environ.get("KUBECONFIG") or os.path.join(os.path.expanduser("~"), ".kube", "config")
+    digest = hashlib.blake2b(digest_size=8)
+    found = False
+    for path in kubeconfig.split(os.pathsep):
+        try:
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+            found = True
+        except OSError:
+            continue
+    if not found:
+        return None
+    digest.update(namespace.encode('utf-8'))
+    return digest.hexdigest()
+
+def load_namespace_cache():
+    """Load the cache of namespaces known to exist, or an empty one."""
+    try:
+        with open(NAMESPACE_CACHE_FILE, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_namespace_cache(cache):
+    """Persist the namespace cache; failures only cost a round-trip next run."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(NAMESPACE_CACHE_FILE, 'w') as file:
+            json.dump(cache, file)
+    except OSError as e:
+        print(f"Warning: Could not write namespace cache: {str(e)}")
+
+def forget_namespace(namespace):
+    """
+    Drop the namespace's cache entry so the next ensure_namespace probes kubectl again.
+    
+    Args:
+        namespace (str): Kubernetes namespace
+    """
+    cache_key = namespace_cache_key(namespace)
+    if not cache_key:
+        return
+    cache = load_namespace_cache()
+    if cache.pop(cache_key, None) is not None:
+        save_namespace_cache(cache)
+
+def ensure_namespace(namespace):
+    """
+    Make sure the namespace exists, creating it if needed.
+    
+    Namespaces already confirmed for the current kubeconfig are remembered in
+    NAMESPACE_CACHE_FILE, so warm runs skip the API server round-trips.
+    
+    Args:
+        namespace (str): Kubernetes namespace
+        
+    Returns:
+        bool: True if the namespace exists, False otherwise
+    """
+    cache_key = namespace_cache_key(namespace)
+    cache = load_namespace_cache() if cache_key else {}
+    if cache_key and cache_key in cache:
+        print(f"Namespace {namespace} already exists (cached)")
+        return True
+    
+    try:
+        probe = subprocess.run(
+            ["kubectl", "get", "namespace", namespace, "-o", "name"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+    except subprocess.TimeoutExpired as e:
+        print(f"Error checking namespace: {str(e)}")
+        return False
+    if probe.returncode == 0:
+        print(f"Namespace {namespace} already exists")
+    else:
+        print(f"Creating namespace {namespace} if it doesn't exist")
+        # The probe already showed the namespace is missing, so a plain create is
+        # enough; AlreadyExists only means something else created it meanwhile
+        try:
+            result = subprocess.run(
+                ["kubectl", "create", "namespace", namespace],
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+        except subprocess.TimeoutExpired as e:
+            print(f"Error creating namespace: {str(e)}")
+            return False
+        if result.returncode != 0 and "AlreadyExists" not in result.stderr:
+            print(f"Error creating namespace: kubectl exited with status {result.returncode}")
+            print(f"Stderr: {result.stderr or 'None'}")
+            print(f"Stdout: {result.stdout or 'None'}")
+            return False
+        print(f"Namespace {namespace} ready")
+    
+    if cache_key:
+        cache[cache_key] = namespace
+        save_namespace_cache(cache)
+    return True
+
+def build_helm_command(release_name, chart_path, namespace, values_file, registry,
+                       container_cluster_id, container_cluster_token, pairing_key, debug=False,
+                       helm_timeout=300):
+    """
+    Build the helm upgrade --install argv for the Illumio chart.
+    
+    Args:
+        release_name (str): Helm release name
+        chart_path (str): Path to the Helm chart
+        namespace (str): Kubernetes namespace
+        values_file (str): Path to values.yaml file
+        registry (str): Container registry
+        container_cluster_id (str): Cluster ID from PCE
+        container_cluster_token (str): Cluster Token from PCE
+        pairing_key (str): Pairing key for cluster
+        debug (bool): Enable debug output
+        helm_timeout (int): Seconds helm waits for the release to become ready
+        
+    Returns:
+        list: Command and arguments to execute
+    """
+    helm_cmd = [
+        "helm", "upgrade", "--install", release_name, chart_path,
+        "--namespace", namespace,
+        "--set", f"cluster_id={container_cluster_id}",
+        "--set", f"cluster_token={container_cluster_token}",
+        "--set", f"cluster_code={pairing_key}",
+        "--set", f"registry={registry}",
+        "-f", values_file,
+        # Wait for the release to be ready and roll it back if it isn't
+        "--atomic", "--wait", "--timeout", f"{helm_timeout}s", "--cleanup-on-fail"
+    ]
+    
+    if debug:
+        helm_cmd.append("--debug")
+    return helm_cmd
+
+async def _pump(stream, out):
+    """Copy a subprocess stream to an output buffer as data arrives."""
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        out.write(chunk)
+        out.flush()
+
+async def _stream_command(cmd):
+    """
+    Run a command, streaming its stdout/stderr to ours as it runs.
+    
+    Args:
+        cmd (list): Command and arguments to execute
+        
+    Returns:
+        int: Exit code of the command
+    """
+    import asyncio
+    # Flush pending print() output so it is not interleaved with the child's
+    sys.stdout.flush()
+    sys.stderr.flush()
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        await asyncio.gather(
+            _pump(proc.stdout, sys.stdout.buffer),
+            _pump(proc.stderr, sys.stderr.buffer)
+        )
+        return await proc.wait()
+    except asyncio.CancelledError:
+        # Don't leave helm running on Ctrl-C
+        if proc.returncode is None:
+            proc.terminate()
+            await proc.wait()
+        raise
+
+# Linear backoff between install attempts, capped so retries stay responsive
+RETRY_BACKOFF_BASE = 5
+RETRY_BACKOFF_CAP = 30
+
+def _discard_future(future):
+    """
+    Drop a background step whose result is no longer needed.
+    
+    Cancels it if it is still pending, otherwise retrieves its exception, so
+    asyncio never reports "Future exception was never retrieved" at exit.
+    
+    Args:
+        future (asyncio.Future): Future to discard
+    """
+    if not future.cancel() and not future.cancelled():
+        future.exception()
+
+async def install_illumio_helm_chart(cluster_name, chart_path='./Illumio/', namespace='illumio-system',
+                                    values_file='values.yaml', release_name='illumio',
+                                    registry='registry.access.redhat.com/ubi9',
+                                    create_namespace=False, debug=False, max_retries=3, env=None,
+                                    helm_timeout=300):
     """
     Install Illumio Helm chart with the specified parameters.
     
@@ -877,208 +1333,212 @@ def install_illumio_helm_chart(cluster_name, chart_path='./Illumio/', namespace=
         debug (bool): Enable debug output
         max_retries (int): Maximum number of installation retries
         env (str): Environment (dev, test, stg, prod)
+        helm_timeout (int): Seconds helm waits for the release to become ready before rolling back
         
     Returns:
         bool: True if installation was successful, False otherwise
     """
-    # First, retrieve secrets from Vault using ejvault
-    container_cluster_id, container_cluster_token, pairing_key = ejvault.retrieve_cluster_secrets(cluster_name, env)
+    import asyncio
+    # The Vault lookup and the access check don't depend on each other, so
+    # start both now and collect the results in the original order
+    secrets_future = asyncio.wrap_future(_EXECUTOR.submit(retrieve_cluster_secrets, cluster_name, env))
+    access_future = asyncio.wrap_future(_EXECUTOR.submit(
+        subprocess.run,
+        ["kubectl", "auth", "can-i", "create", "pods", "-n", namespace],
+        check=True,
+        capture_output=True,
+        text=True,
+        timeout=30
+    ))
+    
+    # First, retrieve secrets from Vault (reused if this process already read or stored them)
+    try:
+        container_cluster_id, container_cluster_token, pairing_key = await secrets_future
+    except BaseException:
+        _discard_future(access_future)
+        raise
     
     if not all([container_cluster_id, container_cluster_token, pairing_key]):
         print(f"Failed to retrieve required secrets for cluster {cluster_name}")
+        _discard_future(access_future)
         return False
     
     print(f"Retrieved cluster secrets for {cluster_name} from Vault")
     
     # Set up namespace if needed
-    if create_namespace:
-        print(f"Creating namespace {namespace} if it doesn't exist")
-        try:
-            subprocess.run(
-                ["kubectl", "create", "namespace", namespace, "--dry-run=client", "-o", "yaml"], 
-                check=True, 
-                stdout=subprocess.PIPE
-            ).stdout.decode('utf-8')
-            
-            result = subprocess.run(
-                ["kubectl", "apply", "-f", "-"],
-                input=subprocess.run(
-                    ["kubectl", "create", "namespace", namespace, "--dry-run=client", "-o", "yaml"], 
-                    check=True, 
-                    stdout=subprocess.PIPE
-                ).stdout,
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            print(f"Namespace {namespace} ready")
-        except subprocess.CalledProcessError as e:
-            print(f"Error creating namespace: {str(e)}")
-            print(f"Stderr: {e.stderr.decode('utf-8') if e.stderr else 'None'}")
-            print(f"Stdout: {e.stdout.decode('utf-8') if e.stdout else 'None'}")
-            return False
+    if create_namespace and not ensure_namespace(namespace):
+        _discard_future(access_future)
+        return False
     
     # Check that we have access to the namespace
     try:
-        subprocess.run(
-            ["kubectl", "auth", "can-i", "create", "pods", "-n", namespace],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        await access_future
         print(f"Confirmed access to namespace {namespace}")
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
         print(f"Error checking namespace access: {str(e)}")
-        print(f"Stderr: {e.stderr.decode('utf-8') if e.stderr else 'None'}")
-        print(f"Stdout: {e.stdout.decode('utf-8') if e.stdout else 'None'}")
+        print(f"Stderr: {e.stderr or 'None'}")
+        print(f"Stdout: {e.stdout or 'None'}")
         return False
     
     # Build the helm install command
-    helm_cmd = [
-        "helm", "upgrade", "--install", release_name, chart_path,
-        "--namespace", namespace,
-        "--set", f"cluster_id={container_cluster_id}",
-        "--set", f"cluster_token={container_cluster_token}",
-        "--set", f"cluster_code={pairing_key}",
-        "--set", f"registry={registry}",
-        "-f", values_file
-    ]
+    helm_cmd = build_helm_command(release_name, chart_path, namespace, values_file, registry,
+                                  container_cluster_id, container_cluster_token, pairing_key, debug,
+                                  helm_timeout)
     
-    if debug:
-        helm_cmd.append("--debug")
-    
-    # Try to install the chart
+    # Try to install the chart. With --atomic, helm waits for the release to be
+    # ready and rolls it back itself on failure, so a retry is just a rerun.
     retries = 0
     success = False
     while retries < max_retries and not success:
+        if retries > 0:
+            delay = min(RETRY_BACKOFF_BASE * retries, RETRY_BACKOFF_CAP)
+            print(f"Retry {retries}/{max_retries} in {delay}s...")
+            await asyncio.sleep(delay)
+            if create_namespace:
+                # The cached namespace may have been deleted since it was recorded,
+                # so check it with kubectl again (and recreate it) before retrying
+                forget_namespace(namespace)
+                ensure_namespace(namespace)
+        
+        print(f"Installing Illumio Helm chart with command: {' '.join(helm_cmd)}")
         try:
-            if retries > 0:
-                print(f"Retry {retries}/{max_retries}...")
-                # Clean up from previous attempt
-                cleanup_failed_installation(release_name, namespace)
-                time.sleep(5)  # Wait a bit before retrying
-            
-            print(f"Installing Illumio Helm chart with command: {' '.join(helm_cmd)}")
-            result = subprocess.run(
-                helm_cmd,
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            
-            print("Helm install command executed successfully")
-            
-            # Wait for pods to start
-            print("Waiting for pods to start...")
-            time.sleep(30)
-            
-            # Check pod status
-            pod_status = subprocess.run(
-                ["kubectl", "get", "pods", "-n", namespace, "-l", f"app.kubernetes.io/instance={release_name}", "-o", "json"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            
-            pod_json = json.loads(pod_status.stdout)
-            pods_ready = True
-            for pod in pod_json.get("items", []):
-                pod_name = pod.get("metadata", {}).get("name", "unknown")
-                pod_phase = pod.get("status", {}).get("phase", "Unknown")
-                print(f"Pod {pod_name} is in phase {pod_phase}")
-                
-                # Check for both phase and container statuses
-                if pod_phase != "Running":
-                    # Only consider Succeeded as an acceptable non-Running state
-                    if pod_phase != "Succeeded":
-                        print(f"Pod {pod_name} is not running (status: {pod_phase})")
-                        pods_ready = False
-                
-                # Check container statuses if available
-                if "status" in pod and "containerStatuses" in pod["status"]:
-                    for container in pod["status"]["containerStatuses"]:
-                        container_name = container.get("name", "unknown")
-                        ready = container.get("ready", False)
-                        if not ready:
-                            print(f"Container {container_name} in pod {pod_name} is not ready")
-                            pods_ready = False
-                        
-                        # Check for container restarts or crash loops
-                        restart_count = container.get("restartCount", 0)
-                        state = container.get("state", {})
-                        if restart_count > 3:
-                            print(f"Container {container_name} has restarted {restart_count} times - possible crash loop")
-                            pods_ready = False
-                        
-                        # Check if container is in waiting state with error
-                        if "waiting" in state and "reason" in state["waiting"]:
-                            reason = state["waiting"]["reason"]
-                            if reason in ["CrashLoopBackOff", "Error", "ImagePullBackOff", "CreateContainerError"]:
-                                print(f"Container {container_name} is in error state: {reason}")
-                                pods_ready = False
-                                
-            if pods_ready:
-                print("All pods are running or completed successfully")
-                success = True
-                
-                # Following the requirement: Assign namespace labels to profiles after successful helm installation
-                # Get the cluster manager instance to perform label assignment
-                manager = IllumioClusterManager(cluster_name, env)
-                
-                # Ensure the cluster manager has the correct container_cluster_id
-                # This fixes the issue when the cluster already exists
-                if not manager.container_cluster_id and container_cluster_id:
-                    print(f"Setting container_cluster_id to {container_cluster_id}")
-                    manager.container_cluster_id = container_cluster_id
-                
-                # Verify we have a valid container_cluster_id before proceeding
-                if not manager.container_cluster_id:
-                    print("Error: container_cluster_id is empty. Cannot assign labels.")
-                    print("The cluster exists but couldn't be properly identified.")
-                    return True  # Return True since the installation itself was successful
-
-                print(f"Using container_cluster_id: {manager.container_cluster_id}")
-                
-                # Get profile and label answers
-                try:
-                    profile_url = f"{manager.base_url}/container_clusters/{manager.container_cluster_id}/container_workload_profiles"
-                    print(f"Retrieving container workload profiles using URL: {profile_url}")
-                    profile_answer = manager.get_requests(profile_url)
-                    label_answer = manager.get_requests(f"{manager.base_url}/labels")
-                    
-                    # Only assign namespace labels after successful helm install
-                    for item in profile_answer:
-                        namespace = item.get("namespace")
-                        if namespace:
-                            manager.assign_namespace_labels(item, label_answer)
-                    
-                    print("Assigned namespace labels to profiles after successful installation")
-                except Exception as e:
-                    print(f"Warning: Failed to assign labels: {str(e)}")
-                    print("Continuing with installation as successful, but labels were not assigned")
-                
-                return True
-            else:
-                print("Not all pods are ready yet, will retry...")
-                retries += 1
-                
-        except subprocess.CalledProcessError as e:
-            print(f"Error installing Helm chart: {str(e)}")
-            print(f"Stderr: {e.stderr if e.stderr else 'None'}")
-            print(f"Stdout: {e.stdout if e.stdout else 'None'}")
+            # helm enforces helm_timeout itself; the margin only catches a hung client
+            returncode = await asyncio.wait_for(_stream_command(helm_cmd), helm_timeout + 60)
+        except asyncio.TimeoutError:
+            print(f"Error installing Helm chart: helm did not finish within {helm_timeout + 60}s")
+            # The client was killed mid-install, so --atomic can't roll back for us
+            await asyncio.get_running_loop().run_in_executor(_EXECUTOR, cleanup_failed_installation, release_name, namespace)
             retries += 1
+            continue
+        if returncode != 0:
+            print(f"Error installing Helm chart: helm exited with status {returncode}")
+            retries += 1
+            continue
+        success = True
     
     if not success:
         print(f"Failed to install Illumio Helm chart after {max_retries} attempts")
+        if create_namespace:
+            forget_namespace(namespace)
         return False
     
-    return success
+    print("Helm install command executed successfully and all resources are ready")
+    
+    # Following the requirement: Assign namespace labels to profiles after successful helm installation
+    # Get the cluster manager instance to perform label assignment
+    manager = IllumioClusterManager(cluster_name, env)
+    
+    # Ensure the cluster manager has the correct container_cluster_id
+    # This fixes the issue when the cluster already exists
+    if not manager.container_cluster_id and container_cluster_id:
+        print(f"Setting container_cluster_id to {container_cluster_id}")
+        manager.container_cluster_id = container_cluster_id
+    
+    # Verify we have a valid container_cluster_id before proceeding
+    if not manager.container_cluster_id:
+        print("Error: container_cluster_id is empty. Cannot assign labels.")
+        print("The cluster exists but couldn't be properly identified.")
+        return True  # Return True since the installation itself was successful
+    
+    print(f"Using container_cluster_id: {manager.container_cluster_id}")
+    
+    # Get profile and label answers
+    try:
+        profile_url = f"{manager.base_url}/container_clusters/{manager.container_cluster_id}/container_workload_profiles"
+        print(f"Retrieving container workload profiles using URL: {profile_url}")
+        profile_answer = manager.get_requests(profile_url)
+        label_index = dict(manager.get_label_index())
+        
+        # Create any missing namespace labels up front, in parallel, so
+        # the updates below only have to look them up
+        namespace_profiles = [item for item in profile_answer if item.get("namespace")]
+        created = manager.create_namespace_labels([item["namespace"] for item in namespace_profiles])
+        label_index.update({(label["key"], label["value"]): label["href"] for label in created})
+        
+        # Only assign namespace labels after successful helm install. Each
+        # profile update is independent, so send them concurrently.
+        if namespace_profiles:
+            with ThreadPoolExecutor(max_workers=min(8, len(namespace_profiles))) as executor:
+                list(executor.map(lambda item: manager.assign_namespace_labels(item, label_index), namespace_profiles))
+        
+        print("Assigned namespace labels to profiles after successful installation")
+    except Exception as e:
+        print(f"Warning: Failed to assign labels: {str(e)}")
+        print("Continuing with installation as successful, but labels were not assigned")
+    
+    return True
 
-def main():
-    """Parse arguments and run Illumio cluster manager and/or install Helm chart."""
+def run_cluster_manager_step(cluster_name, env):
+    """Create or look up the cluster in PCE and store its secrets in Vault."""
+    print(f"=== Managing Illumio Cluster: {cluster_name} ===")
+    manager = IllumioClusterManager(cluster_name, env)
+    manager.run()
+
+async def helm_dependency_update(chart_path):
+    """
+    Fetch the chart's dependencies ahead of the install.
+    
+    Failures are reported but not fatal; helm install will surface any
+    dependency that is genuinely missing.
+    """
+    import asyncio
+    proc = await asyncio.create_subprocess_exec(
+        "helm", "dependency", "update", chart_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        print(f"Warning: helm dependency update failed: {stderr.decode('utf-8', 'replace').strip()}")
+
+async def prepare_and_install(args, run_cluster_manager):
+    """
+    Run the independent preparation steps concurrently, then install the chart.
+    
+    The PCE/Vault cluster management, the values.yaml image/registry rewrite and
+    the helm dependency update don't depend on each other; only the final
+    helm upgrade --install needs all of them to have finished.
+    
+    Returns:
+        bool: True if installation was successful, False otherwise
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    # Load the values before anything is created in PCE/Vault, so a bad values
+    # file exits with nothing to clean up
+    values_handle, values = open_values(args.values_file)
+    steps = [helm_dependency_update(args.chart_path)]
+    if values_handle is not None:
+        steps.append(loop.run_in_executor(None, rewrite_values, args.values_file, args.registry, values_handle, values))
+    if run_cluster_manager:
+        steps.append(loop.run_in_executor(None, run_cluster_manager_step, args.cluster_name, args.env))
+    await asyncio.gather(*steps)
+   
+    # Install Illumio Helm chart
+    print(f"=== Installing Illumio Helm Chart in Cluster: {args.cluster_name} ===")
+    return await install_illumio_helm_chart(
+        args.cluster_name,
+        args.chart_path,
+        args.namespace,
+        args.values_file,
+        args.release_name,
+        args.registry,
+        args.create_namespace,
+        args.debug,
+        env=args.env,
+        helm_timeout=args.helm_timeout
+    )
+
+def parse_args(argv=None):
+    """
+    Parse command-line arguments.
+    
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv[1:]
+        
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
     parser = argparse.ArgumentParser(description='Manage Illumio clusters and install Helm chart')
     parser.add_argument('--cluster-name', '--cluster', '-c', required=True, help='Name of the Kubernetes cluster')
     parser.add_argument('--chart-path', default='./Illumio/', help='Path to the Helm chart directory')
@@ -1088,11 +1548,27 @@ def main():
     parser.add_argument('--registry', required=True, help='Container registry')
     parser.add_argument('--create-namespace', action='store_true', help='Create namespace if it does not exist')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
+    parser.add_argument('--helm-timeout', type=int, default=300, help='Seconds to wait for the release to become ready (default: 300)')
     parser.add_argument('--install-only', action='store_true', help='Only install Helm chart without managing cluster')
     parser.add_argument('--manage-only', action='store_true', help='Only manage cluster without installing Helm chart')
     parser.add_argument('--env', required=True, choices=['dev', 'test', 'stg', 'prod'], help='Environment to use (dev, test, stg, prod)')
     
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+def _banner(lines):
+    """Render lines between two rules of '=' as a single bytes buffer."""
+    rule = "=" * 80
+    return "\n".join([rule, *lines, rule, ""]).encode('utf-8')
+
+def print_banner(lines):
+    """Write a banner to stdout with a single write."""
+    sys.stdout.flush()  # keep ordering with earlier print() output
+    sys.stdout.buffer.write(_banner(lines))
+    sys.stdout.buffer.flush()
+
+def main():
+    """Parse arguments and run Illumio cluster manager and/or install Helm chart."""
+    args = parse_args()
     
     # Default behavior is to run both actions
     run_cluster_manager = not args.install_only
@@ -1103,87 +1579,71 @@ def main():
         print("Error: Cannot specify both --install-only and --manage-only")
         sys.exit(1)
    
-    # Check if kubectl is installed when needed
+    # Check if kubectl and Helm are installed when needed; the checks are
+    # independent, so run them at the same time
     if run_helm_install:
-        try:
-            subprocess.run(["kubectl", "version", "--client"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except:
-            print("Error: kubectl is not installed or not in PATH")
-            sys.exit(1)
-   
-        # Check if Helm is installed
-        try:
-            subprocess.run(["helm", "version", "--short"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except:
-            print("Error: Helm is not installed or not in PATH")
-            sys.exit(1)
+        tool_checks = {
+            _EXECUTOR.submit(subprocess.run, cmd, check=True, capture_output=True, timeout=30): tool
+            for tool, cmd in (("kubectl", ["kubectl", "version", "--client"]), ("Helm", ["helm", "version", "--short"]))
+        }
+        for future in as_completed(tool_checks):
+            try:
+                future.result()
+            except Exception:
+                print(f"Error: {tool_checks[future]} is not installed or not in PATH")
+                sys.exit(1)
    
         # Ensure values file exists - check both absolute and relative paths
         values_path = args.values_file
         if not os.path.isabs(values_path):
-            # Try current directory first
-            if os.path.isfile(values_path):
-                values_path = os.path.abspath(values_path)
-            # Then try relative to chart path
-            elif os.path.isfile(os.path.join(args.chart_path, values_path)):
-                values_path = os.path.abspath(os.path.join(args.chart_path, values_path))
+            # Try current directory first, then relative to chart path, with
+            # one stat per candidate and abspath only for the one that exists
+            for candidate in (values_path, os.path.join(args.chart_path, values_path)):
+                try:
+                    if S_ISREG(os.stat(candidate).st_mode):
+                        values_path = os.path.abspath(candidate)
+                        break
+                except OSError:
+                    continue
             else:
                 print(f"Error: Values file '{args.values_file}' not found in current directory or chart path '{args.chart_path}'")
                 print(f"Please ensure values.yaml exists in one of these locations:")
                 print(f"1. Current directory: {os.getcwd()}")
                 print(f"2. Chart directory: {os.path.abspath(args.chart_path)}")
                 sys.exit(1)
-        elif not os.path.isfile(values_path):
-            print(f"Error: Values file not found at absolute path: {values_path}")
-            sys.exit(1)
+        else:
+            try:
+                is_file = S_ISREG(os.stat(values_path).st_mode)
+            except OSError:
+                is_file = False
+            if not is_file:
+                print(f"Error: Values file not found at absolute path: {values_path}")
+                sys.exit(1)
         
         # Update args.values_file with the verified path
         args.values_file = values_path
    
-    # Run Illumio cluster manager if needed
-    if run_cluster_manager:
-        print(f"=== Managing Illumio Cluster: {args.cluster_name} ===")
-        manager = IllumioClusterManager(args.cluster_name, args.env)
-        manager.run()
-   
-    # Process images and update registry names if installing
     if run_helm_install:
-        print(f"=== Processing images for registry: {args.registry} ===")
-        process_images(args.values_file, args.registry)
-        update_registry_names(args.values_file, args.registry)
-   
-        # Install Illumio Helm chart
-        print(f"=== Installing Illumio Helm Chart in Cluster: {args.cluster_name} ===")
-        result = install_illumio_helm_chart(
-            args.cluster_name,
-            args.chart_path,
-            args.namespace,
-            args.values_file,
-            args.release_name,
-            args.registry,
-            args.create_namespace,
-            args.debug,
-            env=args.env
-        )
+        import asyncio  # deferred: --help and --manage-only never start an event loop
+        result = asyncio.run(prepare_and_install(args, run_cluster_manager))
    
         if result:
-            print("="*80)
-            print(f"Illumio Helm chart successfully installed!")
-            print(f"Cluster: {args.cluster_name}")
-            print(f"Namespace: {args.namespace}")
-            print(f"Release: {args.release_name}")
-            print("="*80)
+            print_banner([
+                "Illumio Helm chart successfully installed!",
+                f"Cluster: {args.cluster_name}",
+                f"Namespace: {args.namespace}",
+                f"Release: {args.release_name}"
+            ])
             sys.exit(0)
         else:
-            print("="*80)
-            print("Illumio Helm chart installation failed")
-            print("Check the error messages above for details")
-            print("="*80)
+            print_banner([
+                "Illumio Helm chart installation failed",
+                "Check the error messages above for details"
+            ])
             sys.exit(1)
     else:
-        print("="*80)
-        print(f"Illumio cluster {args.cluster_name} management completed")
-        print("="*80)
+        run_cluster_manager_step(args.cluster_name, args.env)
+        print_banner([f"Illumio cluster {args.cluster_name} management completed"])
         sys.exit(0)
  
 if __name__ == "__main__":
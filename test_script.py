@@ -5,14 +5,79 @@
 
 # Import necessary libs
 import argparse
-import json
+from collections import defaultdict
 import os
 import re
 import requests
 import urllib3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from bin.illumio import ejconfig
 from bin.illumio import ejvault
 
+try:
+    import ijson  # optional: lets the label list be indexed as it streams in
+except ImportError:
+    ijson = None
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# One pooled session for every PCE call, so TLS and the proxy CONNECT are
+# set up once per host instead of once per request
+_HEADERS = {'Content-Type': 'application/json'}
+_PROXIES = {'http': 'http://zscaler.abc.com:8410', 'https': 'http://zscaler.abc.com:8410'}
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=5, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])))
+SESSION.headers.update(_HEADERS)
+SESSION.verify = False
+SESSION.proxies.update(_PROXIES)
+# Without this, HTTP(S)_PROXY from the environment would override Zscaler for PCE calls
+SESSION.trust_env = False
+
+# The org doesn't change during a run, so the PCE URLs are built once here and only the ids are filled in per call
+org = ejconfig.org_id
+BASE = f"https://us-scp14.illum.io/api/v2/orgs/{org}"
+CLUSTERS_URL = BASE + "/container_clusters"
+LABELS_URL = BASE + "/labels"
+PAIRING_PROFILES_URL = BASE + "/pairing_profiles"
+PROFILES_URL_TMPL = CLUSTERS_URL + "/{cid}/container_workload_profiles"
+PROFILE_URL_TMPL = PROFILES_URL_TMPL + "/{pid}"
+PAIRING_KEY_URL_TMPL = PAIRING_PROFILES_URL + "/{pid}/pairing_key"
+
+# Cluster names are positional: chars 2-4 (or 5) carry the environment, 6 the location and 8-9 the node environment
+CLUSTER_RE = re.compile(r'^.{0,2}(?P<env3>.{0,3})(?P<env1>.?)(?P<loc>.?).?(?P<env2>.{0,2})', re.S)
+_ENV_MAP3 = {"dev": "Development", "cln": "Clone", "uat": "Clone", "prd": "Production"}
+_ENV_MAP1 = {"d": "Development", "q": "Clone", "a": "Clone", "c": "Clone", "p": "Production"}
+_ENV_MAP2 = {"dv": "Development", "te": "Clone", "st": "Clone", "pr": "Production"}
+_LOC_MAP = {"s": "Azure South Central US", "n": "Azure North Central US"}
+
+
+def index_labels(label_answer):
+    """
+    Index the PCE labels for constant-time lookups
+    Returns a dict of label by value and a dict of label lists by key
+    """
+    label_by_value = {}
+    labels_by_key = defaultdict(list)
+    for label in label_answer:
+        label_by_value[label["value"]] = label
+        labels_by_key[label["key"]].append(label)
+    return label_by_value, labels_by_key
+
+
+def get_labels_indexed(user, key, url):
+    """
+    GET the PCE label list and index it
+    With ijson installed the labels are indexed as the response streams in, so the full list is never built
+    """
+    if ijson is None:
+        return index_labels(get_requests(user, key, url))
+    with SESSION.get(url, timeout=15, auth=(user, key), stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True  # let ijson see decompressed bytes
+        return index_labels(ijson.items(r.raw, 'item'))
+
 
 def parse_args():
 
@@ -39,29 +104,30 @@ def main():
     node_role = "Cluster Node"
     container_cluster_id = ""
     container_workload_profile_id = ""
-    org = ejconfig.org_id
 
 
     # Defining the URL for listing Container Clusters
-    cluster_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters"
-    policy_version_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/sec_policy"
+    cluster_url = CLUSTERS_URL
+    policy_version_url = BASE + "/sec_policy"
 
     temp_success, user, key = ejvault.get_pce_secrets()
 
     if temp_success:
 
-        # Requesting profile info from PCE.  We will change the response to text and then load it into JSON format so we can iterate through it
-        answer_json = get_requests(user, key, cluster_url)
-
         # As we iterate through each cluster profile, we will retrieve the namespaces or profiles inside the container cluster
-        # We will also make a request to get the labels and href for each profile
         #
-        # After we have the profile information, we will then request information for every label configured in the PCE
+        # The labels configured in the PCE don't change while we work through the profiles, so they are requested
+        # once here and passed to every label assignment. The cluster and label listings don't depend on each other,
+        # so both GETs are in flight at the same time
         #
-        label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
-        answer_json = get_requests(user, key, label_url)
+        label_url = LABELS_URL
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            cluster_future = executor.submit(get_requests, user, key, cluster_url)
+            label_future = executor.submit(get_labels_indexed, user, key, label_url)
+            cluster_answer = cluster_future.result()
+            label_by_value, labels_by_key = label_future.result()
         cluster_exists = False
-        for item in answer_json:
+        for item in cluster_answer:
             name = item["name"]
             if name == cluster_name:
                 cluster_exists = True
@@ -73,18 +139,10 @@ def main():
                 #k8s_create()
                 #helm_install()
                 cluster_href = item["href"]
-                container_cluster_id = cluster_href.split('/', 4)[-1]
-                profile_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters/{container_cluster_id}/container_workload_profiles"
+                container_cluster_id = cluster_href.rpartition('/')[2]
+                profile_url = PROFILES_URL_TMPL.format(cid=container_cluster_id)
                 profile_answer = get_requests(user, key, profile_url)
-                for item in profile_answer:
-                    namespace = item["namespace"]
-                    profile_href = item["href"]
-                    container_workload_profile_id = profile_href.split('/', 6)[-1]
-                    profile_details_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters/{container_cluster_id}/container_workload_profiles/{container_workload_profile_id}"
-                    label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
-                    label_answer = get_requests(user, key, label_url)
-                    if namespace != None:
-                        assign_namespace_labels(user, key, item, label_answer)
+                assign_all_namespace_labels(user, key, profile_answer, label_by_value, container_cluster_id, cluster_name)
 
         if cluster_exists == False:
 
@@ -95,34 +153,27 @@ def main():
             cluster_details = create_container_cluster(user, key, cluster_name)
 
             ## Get cluster token and ID
-            for item in cluster_details:
-                container_cluster_token = item["container_cluster_token"]
-                container_cluster_href = item["href"]
-                container_cluster_id = container_cluster_href.split('/', 4)[-1]
-                profile_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters/{container_cluster_id}/container_workload_profiles"
-                profile_answer = get_requests(user, key, profile_url)
+            container_cluster_token = cluster_details["container_cluster_token"]
+            container_cluster_id = cluster_details["href"].rpartition('/')[2]
+            profile_url = PROFILES_URL_TMPL.format(cid=container_cluster_id)
+            profile_answer = get_requests(user, key, profile_url)
 
             ## Apply default labels
-            label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
-            label_answer = get_requests(user, key, label_url)
+            ## Refresh the labels once so they include the cluster label created above
+            label_by_value, labels_by_key = get_labels_indexed(user, key, label_url)
             for item in profile_answer:
                 namespace = item["namespace"]
                 profile_href = item["href"]
-                container_workload_profile_id = profile_href.split('/', 6)[-1]
-                profile_details_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters/{container_cluster_id}/container_workload_profiles/{container_workload_profile_id}"
+                container_workload_profile_id = profile_href.rpartition('/')[2]
+                profile_details_url = PROFILE_URL_TMPL.format(cid=container_cluster_id, pid=container_workload_profile_id)
                 if namespace != None:
-                    assign_namespace_labels(user, key, item, label_answer)
+                    assign_namespace_labels(user, key, item, label_by_value, container_cluster_id, cluster_name)
                 else:
-                    assign_default_labels(user, key, item)
+                    assign_default_labels(user, key, item, label_by_value, labels_by_key, cluster_name, profile_details_url, container_role)
                  
             ## Create pairing profile and key
-            pairing_profile_details = create_pairing_profile(user, key, cluster_name)
-            for item in pairing_profile_details:
-                profile_href = item["href"]
-                pairing_profile_id = profile_href.split('/', 4)[-1]
-            pairing_key_details = create_pairing_key(user, key, pairing_profile_id)
-            for item in pairing_key:
-                pairing_key = item["activation_code"]
+            pairing_profile_id = create_pairing_profile(user, key, cluster_name, label_by_value)
+            pairing_key = create_pairing_key(user, key, pairing_profile_id, cluster_name)
 
             ## Save id, token, and code to Vault
             success = ejvault.store_illumio_install_secrets(container_cluster_token, container_cluster_id, pairing_key)
@@ -134,12 +185,9 @@ def main():
             #helm_install()
 
             ## Apply namespace labels
-            label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
-            label_answer = get_requests(user, key, label_url)
-            for item in profile_answer:
-                namespace = item["namespace"]
-                if namespace != None:
-                    assign_namespace_labels(user, key, item, label_answer)
+            ## Refresh the labels again so the namespace labels created in the first pass are found rather than POSTed twice
+            label_by_value, labels_by_key = get_labels_indexed(user, key, label_url)
+            assign_all_namespace_labels(user, key, profile_answer, label_by_value, container_cluster_id, cluster_name)
 
     else:
       print("Could not retrieve API credentials from Vault")
@@ -147,216 +195,134 @@ def main():
  
 
 
-def assign_default_labels(user, key, item):
+def assign_default_labels(user, key, item, label_by_value, labels_by_key, cluster_name, profile_details_url, container_role):
     label = ""
     label_list = ["data", "kubeapi", "metadataapi", "riskscore"]
     assigned_labels = item["assign_labels"]
     labels = item["labels"]
     state = item["managed"]
-    if state == False:
-        new_state = '{"managed": ' + "true" + ', "enforcement_mode": "visibility_only"}'
-        answer_json = put_requests(user, key, profile_details_url, new_state)
-        print("Set mode to MANAGED and enforcement mode to VISIBILITY ONLY")
-    role_href = ""
-    type_href = ""
-    env_href = ""
-    location_href = ""
-    cluster_href = ""
     labels.clear()
     for list_label in label_list:
-        if list_label == "data":
-            data_label = ""
-            for pce_label in label_answer_json:
-                label_item_key = pce_label["key"]
-                if list_label == label_item_key:
-                    label_href = pce_label["href"]
-                    label_value = pce_label["value"]
-                    if data_label == "":
-                        data_label = '{"href": "' + label_href + '"}'
-                    else:
-                        data_label = data_label + ', {"href": "' + label_href + '"}'
-            data_label = '{"key": "' + list_label + '", "restriction": [' + data_label + ']}'
-            data_dict = json.loads(data_label)
-            labels.append(data_dict)
-        elif list_label == "riskscore":
-            riskscore_label = ""
-            for pce_label in label_answer_json:
-                label_item_key = pce_label["key"]
-                if list_label == label_item_key:
-                    label_href = pce_label["href"]
-                    label_value = pce_label["value"]
-                    if riskscore_label == "":
-                        riskscore_label = '{"href": "' + label_href + '"}'
-                    else:
-                        riskscore_label = riskscore_label + ', {"href": "' + label_href + '"}'
-            riskscore_label = '{"key": "' + list_label + '", "restriction": [' + riskscore_label + ']}'
-            risk_dict = json.loads(riskscore_label)
-            labels.append(risk_dict)
+        if list_label == "data" or list_label == "riskscore":
+            #
+            # data and riskscore are restricted to every PCE label of that key, in a single entry
+            #
+            restriction = [{"href": pce_label["href"]} for pce_label in labels_by_key.get(list_label, [])]
+            labels.append({"key": list_label, "restriction": restriction})
         else:
-            for pce_label in label_answer_json:
-                label_item_key = pce_label["key"]
-                if list_label == label_item_key:
-                  label_key = pce_label["key"]
-                  label_href = pce_label["href"]
-                  label_value = pce_label["value"]
-                  #if label == "":
-                  label = '{"key": "' + label_key + '", "restriction": [{"href": "' + label_href + '"}]}'
-                  label_dict = json.loads(label)
-                  labels.append(label_dict)
-                  #else:
-                  #         label = label + ', {"key": "' + label_key + '", "restriction": [{"href": "' + label_href + '"}]}'                  
-    labels_str = json.dumps(labels)
-    label_update = '{"labels": ' + labels_str + '}'
-    answer_json = put_requests(user, key, profile_details_url, label_udpate)
-    print("Container Annotation labels updated for DEFAULT profile in cluster " + cluster_name.upper())
+            for pce_label in labels_by_key.get(list_label, []):
+                labels.append({"key": pce_label["key"], "restriction": [{"href": pce_label["href"]}]})
     assigned_labels.clear()
-    target_env = cluster_name[2:5]
-    if target_env == "dev":
-        env = "Development"
-    elif target_env == "cln" or target_env == "uat":
-        env = "Clone"
-    elif target_env == "prd":
-        env = "Production"
-    else:
-        target_env = cluster_name[5:6]
-        if target_env == 'd':
-            env = "Development"
-        elif target_env == 'q' or target_env == 'a' or target_env == 'c':
-            env = "Clone"
-        elif target_env == 'p':
-            env = "Production"
-    target_location = cluster_name[6:7]
-    if target_location == 's':
-        location = "Azure South Central US"
-    elif target_location == 'n':
-        location = "Azure North Central US"
-    else:
-        location = "Azure Central US"
+    m = CLUSTER_RE.match(cluster_name)
+    env = _ENV_MAP3.get(m.group("env3")) or _ENV_MAP1.get(m.group("env1"))
+    location = _LOC_MAP.get(m.group("loc"), "Azure Central US")
     if "gtw" in cluster_name:
         cluster_type = "mulesoft"
     else:
         cluster_type = "general"
-    for item in label_answer_json:
-        if role_href == "" or type_href == "" or env_href == "" or location_href == "" or cluster_href == "":
-            label_name = item["value"]
-            if label_name == container_role:
-                role_href = item["href"]
-            if label_name == cluster_type:
-                type_href = item["href"]
-            if label_name == env:
-                env_href = item["href"]
-            if label_name == location:
-                location_href = item["href"]
-            if label_name == cluster_name:
-                cluster_href = item["href"]
-        else:
-            continue
+    #
+    # The five labels are looked up by value in the index built once in main
+    #
+    role_href = label_by_value.get(container_role, {}).get("href", "")
+    type_href = label_by_value.get(cluster_type, {}).get("href", "")
+    env_href = label_by_value.get(env, {}).get("href", "")
+    location_href = label_by_value.get(location, {}).get("href", "")
+    cluster_href = label_by_value.get(cluster_name, {}).get("href", "")
     if cluster_href == "":
-        new_label_list = []
-        new_label = '{"key": "cluster", "value": "' + cluster_name + '"}'
-        answer_json = (user, key, label_url, new_label)
-        print("Cluster label " + cluster_name.upper() + " created.")
-        new_label_list.append(answer_json)
-        for item in new_label_list:
-            cluster_href = item["href"]
-    role_label = '{"href": "' + role_href + '"}'
-    role_dict = json.loads(role_label)
-    assigned_labels.append(role_dict)
-    type_label = '{"href": "' + type_href + '"}'
-    type_dict = json.loads(type_label)
-    assigned_labels.append(type_dict)
-    environment_label = '{"href": "' + env_href + '"}'
-    environment_dict = json.loads(environment_label)
-    assigned_labels.append(environment_dict)
-    location_label = '{"href": "' + location_href + '"}'
-    location_dict = json.loads(location_label)
-    assigned_labels.append(location_dict)
-    cluster_label = '{"href": "' + cluster_href + '"}'
-    cluster_dict = json.loads(cluster_label)
-    assigned_labels.append(cluster_dict)
-    new_labels_str = json.dumps(assigned_labels)
-    label_update = '{"assign_labels": ' + new_labels_str + '}'
-    answer_json = put_requests(user, key, profile_details_url, label_update)
+        cluster_href = create_cluster_label(user, key, cluster_name)["href"]
+    for href in (role_href, type_href, env_href, location_href, cluster_href):
+        assigned_labels.append({"href": href})
+    #
+    # The mode, container annotation labels and assigned labels all go to the same profile, so they are sent in one PUT
+    #
+    profile_update = {"labels": labels, "assign_labels": assigned_labels}
+    if state == False:
+        profile_update["managed"] = True
+        profile_update["enforcement_mode"] = "visibility_only"
+    answer_json = put_requests(user, key, profile_details_url, profile_update)
+    if state == False:
+        print("Set mode to MANAGED and enforcement mode to VISIBILITY ONLY")
+    print("Container Annotation labels updated for DEFAULT profile in cluster " + cluster_name.upper())
     print("Required labels assigned to DEFAULT profile in cluster " + cluster_name.upper())
 
  
 
    
-def assign_namespace_labels(user, key, item, label_answer_json):
+def assign_all_namespace_labels(user, key, profile_answer, label_by_value, container_cluster_id, cluster_name):
+    #
+    # Each namespace profile is updated independently, so the PUTs are sent from a thread pool
+    # sharing the pooled SESSION. Failures are logged as they complete and don't stop the others.
+    #
+    namespace_profiles = [item for item in profile_answer if item["namespace"] != None]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = {executor.submit(assign_namespace_labels, user, key, item, label_by_value, container_cluster_id, cluster_name): item for item in namespace_profiles}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print("Failed to assign namespace label for " + str(futures[future]["namespace"]) + ": " + str(e))
+
+
+def assign_namespace_labels(user, key, item, label_by_value, container_cluster_id, cluster_name):
 
+    namespace = item["namespace"]
     assigned_labels = item["assign_labels"]
     profile_href = item["href"]
-    container_workload_profile_id = profile_href.split('/', 6)[-1]
-    profile_details_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters/{container_cluster_id}/container_workload_profiles/{container_workload_profile_id}"
+    container_workload_profile_id = profile_href.rpartition('/')[2]
+    profile_details_url = PROFILE_URL_TMPL.format(cid=container_cluster_id, pid=container_workload_profile_id)
     assigned = False
     label_exists = False
-    # For each label in the PCE, we will check to see if the value equals the name of the container profile we're working on
-    # If so, we will get the href for the label
+    # We will look up the PCE label whose value equals the name of the container profile we're working on
+    # If there is one, we will get the href for the label
     # If the href is already in the list of labels assigned to the profile, we will note that it is already assigned
-    for item in label_answer_json:
-        label_name = item["value"]
-        if label_name == namespace:
-            label_href = item["href"]
-            label_exists = True
-            print("Namespace label " + namespace.upper() + " exists.")
-            for label in assigned_labels:
-                if label_href == label["href"]:
-                    assigned = True
-                    print("Namespace label already assigned for " + namespace.upper() + " profile in cluster " + cluster_name.upper())
-                    print("------------------------------------------------------------------------------------")
-            if assigned != True:
-                #
-                # If the namespace label is not assigned, we will add the href to a string and then to a dictionary, and then dump back to a string
-                # This is done so that we get the right formatting for our request body
-                # We will then make a PUT request to the console to assign this namespace label to the container profile we are working on
-                #
-                namespace_label = '{"href": "' + label_href + '"}'
-                namespace_dict = json.loads(namespace_label)
-                assigned_labels.append(namespace_dict)
-                new_labels_str = json.dumps(assigned_labels)
-                label_update = '{"assign_labels": ' + new_labels_str + '}'
-                answer_json = put_requests(user, key, profile_details_url, label_update)
-                print("Namespace label assigned to " + namespace.upper() + " profile in cluster " + cluster_name.upper())
+    namespace_label_item = label_by_value.get(namespace)
+    if namespace_label_item is not None:
+        label_href = namespace_label_item["href"]
+        label_exists = True
+        print("Namespace label " + namespace.upper() + " exists.")
+        for label in assigned_labels:
+            if label_href == label["href"]:
+                assigned = True
+                print("Namespace label already assigned for " + namespace.upper() + " profile in cluster " + cluster_name.upper())
                 print("------------------------------------------------------------------------------------")
+        if assigned != True:
+            #
+            # If the namespace label is not assigned, we will add its href to the assigned labels
+            # We will then make a PUT request to the console to assign this namespace label to the container profile we are working on
+            #
+            assigned_labels.append({"href": label_href})
+            answer_json = put_requests(user, key, profile_details_url, {"assign_labels": assigned_labels})
+            print("Namespace label assigned to " + namespace.upper() + " profile in cluster " + cluster_name.upper())
+            print("------------------------------------------------------------------------------------")
     #
     # If a label does not exist with a name that matches the namespace name, we will create a new label
     #
     if label_exists != True:
 
-        create_assign_namespace_label(user, key, namespace, profile_details_url)
+        create_assign_namespace_label(user, key, namespace, profile_details_url, assigned_labels, cluster_name)
 
  
-def create_assign_namespace_label(user, key, namespace, profile_details_url):
+def create_assign_namespace_label(user, key, namespace, profile_details_url, assigned_labels, cluster_name):
 
-    new_label_list = []
-    new_label = '{"key": "namespace", "value": "' + namespace + '"}'
-    label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
+    new_label = {"key": "namespace", "value": namespace}
+    label_url = LABELS_URL
     answer_json = post_requests(user, key, label_url, new_label)
     print("Namespace label " + namespace.upper() + " created.")
-    new_label_list.append(answer_json)
-    for item in new_label_list:
-        new_label_href = item["href"]
-        #
-        # After creating the new label, we will get its href from the POST response
-        # We will add the href to a string and then to a dictionary, and then dump back to a string
-        # This is done so that we get the right formatting for our request body
-        # We will then make a PUT request to the console to assign this namespace label to the container profile we are working on
-        #
-        namespace_label = '{"href": "' + new_label_href + '"}'
-        namespace_dict = json.loads(namespace_label)
-        assigned_labels.append(namespace_dict)
-        new_labels_str = json.dumps(assigned_labels)
-        label_update = '{"assign_labels": ' + new_labels_str + '}'
-        answer_json = put_requests(user, key, profile_details_url, label_update)
-        print("Namespace label assigned to " + namespace.upper() + " profile in cluster " + cluster_name.upper())
-        print("------------------------------------------------------------------------------------")
+    #
+    # After creating the new label, we will get its href from the POST response
+    # We will then make a PUT request to the console to assign this namespace label to the container profile we are working on
+    #
+    assigned_labels.append({"href": answer_json["href"]})
+    answer_json = put_requests(user, key, profile_details_url, {"assign_labels": assigned_labels})
+    print("Namespace label assigned to " + namespace.upper() + " profile in cluster " + cluster_name.upper())
+    print("------------------------------------------------------------------------------------")
 
  
 
 def create_cluster_label(user, key, cluster_name):
 
-    new_label = '{"key": "cluster", "value": "' + cluster_name + '"}'
-    label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
+    new_label = {"key": "cluster", "value": cluster_name}
+    label_url = LABELS_URL
     answer_json = post_requests(user, key, label_url, new_label)
     print("Cluster label " + cluster_name.upper() + " created.")
     return answer_json
@@ -364,136 +330,84 @@ def create_cluster_label(user, key, cluster_name):
        
 def create_container_cluster(user, key, cluster_name):
 
-    new_cluster = '{"name": "' + cluster_name + '"}'
-    container_cluster_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/container_clusters"
+    new_cluster = {"name": cluster_name}
+    container_cluster_url = CLUSTERS_URL
     answer_json = post_requests(user, key, container_cluster_url, new_cluster)
     print("Container Cluster " + cluster_name.upper() + " created.")
     return answer_json
 
  
-def create_pairing_profile(user, key, cluster_name):
-    pairing_profile_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/pairing_profiles"
-    enforcement_mode = '"enforcement_mode": "visibility_only"'
-    enabled = '"enabled": true'
-    key_lifespan = '"key_lifespan": "unlimited"'
-    allowed_uses_per_key = '"allowed_uses_per_key": "unlimited"'
-    log_traffic = '"log_traffic": false'
-    visibility_level = '"visibility_level": "flow_summary"'
-    ven_type = '"ven_type": "server"'
-    env_label_lock = '"env_label_lock": true'
-    loc_label_lock = '"loc_label_lock": true'
-    role_label_lock = '"role_label_lock": true'
-    app_label_lock = '"app_label_lock": true'
-    enforcement_mode_lock = '"enforcement_mode_lock": true'
-    log_traffic_lock = '"log_traffic_lock": true'
-    visibility_level_lock = '"visibility_level_lock": true'
-    labels = get_labels(cluster_name)
-    new_profile = '{"name": "' + cluster_name + '", ' + enforcement_mode + ', ' + enabled + ', ' + key_lifespan + ', ' + allowed_uses_per_key + ', ' + log_traffic + ', ' + visibility_level + ', ' + ven_type + ', ' + env_label_lock + ', ' + loc_label_lock + ', ' + role_label_lock + ', ' + app_label_lock + ', ' + enforcement_mode_lock + ', ' + log_traffic_lock + ', ' + visibility_level_lock + ', ' + '"labels": [' + labels + ']}'
+def create_pairing_profile(user, key, cluster_name, label_by_value):
+    pairing_profile_url = PAIRING_PROFILES_URL
+    labels = get_labels(cluster_name, label_by_value)
+    new_profile = {
+        "name": cluster_name,
+        "enforcement_mode": "visibility_only",
+        "enabled": True,
+        "key_lifespan": "unlimited",
+        "allowed_uses_per_key": "unlimited",
+        "log_traffic": False,
+        "visibility_level": "flow_summary",
+        "ven_type": "server",
+        "env_label_lock": True,
+        "loc_label_lock": True,
+        "role_label_lock": True,
+        "app_label_lock": True,
+        "enforcement_mode_lock": True,
+        "log_traffic_lock": True,
+        "visibility_level_lock": True,
+        "labels": labels,
+    }
     answer_json = post_requests(user, key, pairing_profile_url, new_profile)
     print("Pairing Profile " + cluster_name.upper() + " created.")
-    return answer_json
+    return answer_json["href"].rpartition('/')[2]
 
  
-def create_pairing_key(user, key, pairing_profile_id):
-    key_gen_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/pairing_profiles/{pairing_profile_id}/pairing_key"
-    data = '{}'
+def create_pairing_key(user, key, pairing_profile_id, cluster_name):
+    key_gen_url = PAIRING_KEY_URL_TMPL.format(pid=pairing_profile_id)
+    data = {}
     answer_json = post_requests(user, key, key_gen_url, data)
     print("Pairing key for " + cluster_name.upper() + " created.")
-    return answer_json
+    return answer_json["activation_code"]
 
  
-def get_requests(user, key, url):
-    headers = dict()
-    headers['Content-Type'] = 'application/json'
-    http_proxy = "http://zscaler.abc.com:8410"
-    https_proxy = "http://zscaler.abc.com:8410"
-    proxies = {'http':http_proxy, 'https':https_proxy}
-    auth = (user, key)
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    r = requests.get(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth)
-    if r.status_code == 204 or r.status_code == 200 or r.status_code == 201:
-        answer = r.text
-        answer_json = json.loads(answer)
-        return answer_json
-    else:
-        get_answer = r.text
+def _call(method, url, **kw):
+    #
+    # Single path for every PCE request. Transient 429/5xx responses are retried by the SESSION adapter,
+    # anything still failing is printed and raised so the caller (or the thread pool) decides what to do
+    #
+    r = SESSION.request(method, url, timeout=15, **kw)
+    try:
+        r.raise_for_status()
+    except requests.exceptions.HTTPError:
         print(r.status_code)
-        print(get_answer)
-        exit(1)
+        print(r.text)
+        raise
+    return r.json() if r.content else None
+
+
+def get_requests(user, key, url):
+    return _call('GET', url, auth=(user, key))
+
 
- 
 def post_requests(user, key, url, data):
-    headers = dict()
-    headers['Content-Type'] = 'application/json'
-    http_proxy = "http://zscaler.abc.com:8410"
-    https_proxy = "http://zscaler.abc.com:8410"
-    proxies = {'http':http_proxy, 'https':https_proxy}
-    auth = (user, key)
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    r = requests.post(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth, data=data)
-    if r.status_code == 204 or r.status_code == 200 or r.status_code == 201:
-        answer = r.text
-        answer_json = json.loads(answer)
-        return answer_json
-    else:
-        get_answer = r.text
-        print(r.status_code)
-        print(get_answer)
-        exit(1)
+    return _call('POST', url, auth=(user, key), json=data)
+
 
-   
 def put_requests(user, key, url, data):
-    headers = dict()
-    headers['Content-Type'] = 'application/json'
-    http_proxy = "http://zscaler.abc.com:8410"
-    https_proxy = "http://zscaler.abc.com:8410"
-    proxies = {'http':http_proxy, 'https':https_proxy}
-    auth = (user, key)
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-    r = requests.put(url, timeout=15, verify=False, headers=headers, proxies=proxies, auth=auth, data=data)
-    if r.status_code == 204 or r.status_code == 200 or r.status_code == 201:
-        answer = r.text
-        answer_json = json.loads(answer)
-        return answer_json
-    else:
-        get_answer = r.text
-        print(r.status_code)
-        print(get_answer)
-        exit(1)
+    return _call('PUT', url, auth=(user, key), json=data)
 
-def get_labels(cluster_name):
-    labels = ''
+
+def get_labels(cluster_name, label_by_value):
+    """
+    Look up the labels for the pairing profile in the label index built in main
+    Returns a list of label hrefs ready for the request body
+    """
     role_label = "Cluster Node"
     location_label = "Azure Greenfield"
+    env_label = _ENV_MAP2.get(CLUSTER_RE.match(cluster_name).group("env2"))
 
-    target_env = cluster_name[8:10]
-    if target_env == "dv":
-        env_label = "Development"
-    elif target_env == "te" or target_env == "st":
-        env_label = "Clone"
-    elif target_env == "pr":
-        env_label = "Production"
-
-    label_url = f"https://us-scp14.illum.io/api/v2/orgs/{org}/labels"
-    label_answer = get_requests(user, key, label_url)
-    for item in label_answer:
-        label_name = item["value"]
-        if label_name == cluster_name:
-            print(label_name)
-            label_href = item["href"]
-            labels = labels + '{"href": "' + label_href + '"}, '
-        if label_name == role_label:
-            label_href = item["href"]
-            labels = labels + '{"href": "' + label_href + '"}, '
-        if label_name == location_label:
-            label_href = item["href"]
-            labels = labels + '{"href": "' + label_href + '"}, '
-        if label_name == env_label:
-            label_href = item["href"]
-            labels = labels + '{"href": "' + label_href + '"}, '
-    labels = labels[:-2]
-    return labels
+    return [{"href": label_by_value[name]["href"]} for name in (cluster_name, role_label, location_label, env_label) if name in label_by_value]
 
    
 # def helm_install():
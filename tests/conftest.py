@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts live at the repo root; bin/illumio modules import each other by bare name
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bin", "illumio"))
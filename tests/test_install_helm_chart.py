@@ -0,0 +1,51 @@
+"""
+install_illumio_helm_chart starts the namespace access check in the background; an early
+return must not leave its failure unretrieved.
+"""
+import asyncio
+import gc
+import logging
+import subprocess
+import threading
+
+import install_illumio_revised as m
+
+# The secrets lookup waits for the access check, so it has always failed by the time we return
+access_checked = threading.Event()
+
+
+def failing_access_check(cmd, **kwargs):
+    access_checked.set()
+    raise subprocess.CalledProcessError(1, cmd, output="", stderr="forbidden")
+
+
+def secrets(*values):
+    def retrieve_cluster_secrets(cluster_name, env):
+        access_checked.wait(5)
+        return values
+    return retrieve_cluster_secrets
+
+
+def run_and_collect(coro, caplog):
+    access_checked.clear()
+    with caplog.at_level(logging.ERROR, logger="asyncio"):
+        result = asyncio.run(coro)
+        gc.collect()
+    return result
+
+
+def test_missing_secrets_discards_failed_access_check(monkeypatch, caplog):
+    monkeypatch.setattr(m, "retrieve_cluster_secrets", secrets(None, None, None))
+    monkeypatch.setattr(m.subprocess, "run", failing_access_check)
+
+    assert run_and_collect(m.install_illumio_helm_chart("c1", env="dev"), caplog) is False
+    assert "never retrieved" not in caplog.text
+
+
+def test_namespace_failure_discards_failed_access_check(monkeypatch, caplog):
+    monkeypatch.setattr(m, "retrieve_cluster_secrets", secrets("id", "token", "key"))
+    monkeypatch.setattr(m.subprocess, "run", failing_access_check)
+    monkeypatch.setattr(m, "ensure_namespace", lambda namespace: False)
+
+    assert run_and_collect(m.install_illumio_helm_chart("c1", create_namespace=True, env="dev"), caplog) is False
+    assert "never retrieved" not in caplog.text
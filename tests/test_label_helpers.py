@@ -0,0 +1,86 @@
+"""
+The label helpers in test_script.py are called from main() and from worker threads,
+so they must work from their arguments alone. These call them outside main() with the
+PCE requests replaced by recorders.
+"""
+import pytest
+
+import test_script
+
+CLUSTER_ID = "c-123"
+CLUSTER_NAME = "akdevxsxdv"
+
+
+@pytest.fixture
+def pce(monkeypatch):
+    calls = []
+
+    def post_requests(user, key, url, data):
+        calls.append(("POST", url, data))
+        return {"href": "/orgs/1/labels/new", "activation_code": "code-1"}
+
+    def put_requests(user, key, url, data):
+        calls.append(("PUT", url, data))
+
+    monkeypatch.setattr(test_script, "post_requests", post_requests)
+    monkeypatch.setattr(test_script, "put_requests", put_requests)
+    return calls
+
+
+def profile(namespace, assign_labels=None, managed=True):
+    return {
+        "href": "/orgs/1/container_clusters/" + CLUSTER_ID + "/container_workload_profiles/p-9",
+        "namespace": namespace,
+        "assign_labels": assign_labels if assign_labels is not None else [],
+        "labels": [],
+        "managed": managed,
+    }
+
+
+def test_assign_namespace_labels_assigns_existing_label(pce):
+    label_by_value = {"web": {"href": "/orgs/1/labels/7", "key": "namespace", "value": "web"}}
+
+    test_script.assign_namespace_labels("u", "k", profile("web"), label_by_value, CLUSTER_ID, CLUSTER_NAME)
+
+    assert pce == [("PUT", test_script.PROFILE_URL_TMPL.format(cid=CLUSTER_ID, pid="p-9"),
+                    {"assign_labels": [{"href": "/orgs/1/labels/7"}]})]
+
+
+def test_assign_namespace_labels_creates_missing_label(pce):
+    item = profile("web")
+
+    test_script.assign_namespace_labels("u", "k", item, {}, CLUSTER_ID, CLUSTER_NAME)
+
+    assert pce[0] == ("POST", test_script.LABELS_URL, {"key": "namespace", "value": "web"})
+    assert pce[1][:2] == ("PUT", test_script.PROFILE_URL_TMPL.format(cid=CLUSTER_ID, pid="p-9"))
+    assert item["assign_labels"] == [{"href": "/orgs/1/labels/new"}]
+
+
+def test_assign_all_namespace_labels_skips_default_profile(pce):
+    label_by_value = {"web": {"href": "/orgs/1/labels/7", "key": "namespace", "value": "web"}}
+
+    test_script.assign_all_namespace_labels("u", "k", [profile("web"), profile(None)], label_by_value, CLUSTER_ID, CLUSTER_NAME)
+
+    assert [call[0] for call in pce] == ["PUT"]
+
+
+def test_assign_default_labels_sends_one_put(pce):
+    label_by_value = {
+        value: {"href": "/orgs/1/labels/" + value, "key": "role", "value": value}
+        for value in ("Container", "general", "Development", "Azure South Central US", CLUSTER_NAME)
+    }
+    url = test_script.PROFILE_URL_TMPL.format(cid=CLUSTER_ID, pid="p-9")
+
+    test_script.assign_default_labels("u", "k", profile(None, managed=False), label_by_value, {}, CLUSTER_NAME, url, "Container")
+
+    assert len(pce) == 1
+    method, put_url, body = pce[0]
+    assert (method, put_url) == ("PUT", url)
+    assert body["managed"] is True
+    assert body["assign_labels"] == [{"href": "/orgs/1/labels/" + value} for value in
+                                     ("Container", "general", "Development", "Azure South Central US", CLUSTER_NAME)]
+
+
+def test_create_pairing_key(pce):
+    assert test_script.create_pairing_key("u", "k", "pp-1", CLUSTER_NAME) == "code-1"
+    assert pce == [("POST", test_script.PAIRING_KEY_URL_TMPL.format(pid="pp-1"), {})]
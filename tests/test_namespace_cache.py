@@ -0,0 +1,99 @@
+"""
+ensure_namespace remembers namespaces per kubeconfig; forget_namespace must make it probe kubectl again.
+"""
+import subprocess
+
+import pytest
+
+import install_illumio_revised as m
+
+
+class FakeKubectl:
+    """Stands in for subprocess.run, tracking which namespaces exist and recording every command."""
+
+    def __init__(self, *namespaces):
+        self.namespaces = set(namespaces)
+        self.commands = []
+
+    def __call__(self, cmd, **kwargs):
+        self.commands.append(cmd[:3])
+        if cmd[:3] == ["kubectl", "get", "namespace"]:
+            if cmd[3] in self.namespaces:
+                return subprocess.CompletedProcess(cmd, 0, stdout=f"namespace/{cmd[3]}\n", stderr="")
+            return subprocess.CompletedProcess(cmd, 1, stdout="", stderr="NotFound")
+        if cmd[:3] == ["kubectl", "create", "namespace"]:
+            self.namespaces.add(cmd[3])
+            return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
+        raise AssertionError(f"unexpected command {cmd}")
+
+
+PROBE = ["kubectl", "get", "namespace"]
+CREATE = ["kubectl", "create", "namespace"]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(m, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(m, "NAMESPACE_CACHE_FILE", str(tmp_path / "cache" / "ns.json"))
+    kubeconfig = tmp_path / "kubeconfig"
+    kubeconfig.write_text("current-context: one\n")
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+    return kubeconfig
+
+
+def use_kubectl(monkeypatch, kubectl):
+    monkeypatch.setattr(m.subprocess, "run", kubectl)
+    return kubectl
+
+
+def test_cache_miss_probes_existing_namespace(monkeypatch):
+    kubectl = use_kubectl(monkeypatch, FakeKubectl("illumio-system"))
+
+    assert m.ensure_namespace("illumio-system") is True
+
+    assert kubectl.commands == [PROBE]
+    assert m.namespace_cache_key("illumio-system") in m.load_namespace_cache()
+
+
+def test_cache_miss_creates_missing_namespace(monkeypatch):
+    kubectl = use_kubectl(monkeypatch, FakeKubectl())
+
+    assert m.ensure_namespace("illumio-system") is True
+
+    assert kubectl.commands == [PROBE, CREATE]
+    assert "illumio-system" in kubectl.namespaces
+
+
+def test_cache_hit_skips_kubectl(monkeypatch):
+    kubectl = use_kubectl(monkeypatch, FakeKubectl("illumio-system"))
+    m.ensure_namespace("illumio-system")
+    kubectl.commands.clear()
+
+    assert m.ensure_namespace("illumio-system") is True
+
+    assert kubectl.commands == []
+
+
+def test_forget_then_ensure_recreates_deleted_namespace(monkeypatch):
+    kubectl = use_kubectl(monkeypatch, FakeKubectl())
+    m.ensure_namespace("illumio-system")
+    kubectl.namespaces.clear()  # deleted behind our back
+    kubectl.commands.clear()
+
+    m.forget_namespace("illumio-system")
+    assert m.namespace_cache_key("illumio-system") not in m.load_namespace_cache()
+    assert m.ensure_namespace("illumio-system") is True
+
+    assert kubectl.commands == [PROBE, CREATE]
+    assert "illumio-system" in kubectl.namespaces
+
+
+def test_other_kubeconfig_does_not_reuse_entry(monkeypatch, cache_dir):
+    kubectl = use_kubectl(monkeypatch, FakeKubectl("illumio-system"))
+    m.ensure_namespace("illumio-system")
+    cache_dir.write_text("current-context: two\n")
+    kubectl.commands.clear()
+
+    m.ensure_namespace("illumio-system")
+
+    assert kubectl.commands == [PROBE]
@@ -0,0 +1,51 @@
+"""
+PCE traffic from test_script.py must always go through the Zscaler proxies set on SESSION,
+whatever proxy variables are set in the environment.
+"""
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+import test_script
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Answers every request with an empty JSON list and records the proxies requests chose."""
+
+    def __init__(self):
+        super().__init__()
+        self.proxies = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.proxies.append(proxies)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"[]"
+        response.request = request
+        response.url = request.url
+        return response
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    recorder = RecordingAdapter()
+    monkeypatch.setitem(test_script.SESSION.adapters, "https://", recorder)
+    return recorder
+
+
+def test_environment_proxy_does_not_override_zscaler(adapter, monkeypatch):
+    monkeypatch.setenv("HTTPS_PROXY", "http://other:1")
+    monkeypatch.setenv("https_proxy", "http://other:1")
+
+    test_script.get_requests("u", "k", test_script.LABELS_URL)
+
+    assert adapter.proxies[-1]["https"] == test_script._PROXIES["https"]
+
+
+def test_no_proxy_does_not_bypass_zscaler(adapter, monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "illum.io")
+    monkeypatch.setenv("no_proxy", "illum.io")
+
+    test_script.get_requests("u", "k", test_script.LABELS_URL)
+
+    assert adapter.proxies[-1]["https"] == test_script._PROXIES["https"]
@@ -0,0 +1,95 @@
+"""
+Token caching and login retries in vault.py, with Vault replaced by a scripted session.
+"""
+import json
+
+import pytest
+import requests
+
+import vault
+
+
+def response(status, body):
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps(body).encode("utf-8")
+    r.url = "https://vault.example"
+    return r
+
+
+def login_response(token):
+    return response(200, {"auth": {"client_token": token, "lease_duration": 600}})
+
+
+CREDS = response(200, {"data": {"api_user": "user", "api_key": "key"}})
+
+
+class FakeSession:
+    """Hands out the scripted login and secret responses in order and records each call."""
+
+    def __init__(self, logins, secrets):
+        self.logins = list(logins)
+        self.secrets = list(secrets)
+        self.posts = []
+        self.gets = []
+
+    def post(self, url, **kwargs):
+        self.posts.append(url)
+        return self.logins.pop(0)
+
+    def get(self, url, headers=None, **kwargs):
+        self.gets.append(headers["X-Vault-Token"])
+        return self.secrets.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def vault_env(monkeypatch):
+    monkeypatch.setattr(vault, "_TOKEN_CACHE", {"token": None, "env": "", "expires_at": 0})
+    monkeypatch.setattr(vault.time, "sleep", lambda seconds: None)
+    monkeypatch.setenv("SA_TOKEN", "jwt")
+    monkeypatch.setenv("ENVIRONMENT", "dev")
+    monkeypatch.setenv("VAULT_LOGIN", "https://vault.example/login")
+    monkeypatch.setenv("PCE_CREDS", "https://vault.example/pce")
+
+
+def use_session(monkeypatch, session):
+    monkeypatch.setattr(vault, "_VAULT_SESSION", session)
+    return session
+
+
+def test_cached_token_is_reused(monkeypatch):
+    session = use_session(monkeypatch, FakeSession([login_response("t1")], [CREDS, CREDS]))
+
+    assert vault.get_pce_secrets() == (True, "user", "key")
+    assert vault.get_pce_secrets() == (True, "user", "key")
+
+    assert len(session.posts) == 1
+    assert session.gets == ["t1", "t1"]
+
+
+def test_forbidden_secret_logs_in_again_once(monkeypatch):
+    denied = response(403, {"errors": ["permission denied"]})
+    session = use_session(monkeypatch, FakeSession([login_response("t1"), login_response("t2")], [denied, CREDS]))
+
+    assert vault.get_pce_secrets() == (True, "user", "key")
+
+    assert len(session.posts) == 2
+    assert session.gets == ["t1", "t2"]
+
+
+def test_refused_login_is_not_retried(monkeypatch):
+    refused = response(400, {"errors": ["invalid role"]})
+    session = use_session(monkeypatch, FakeSession([refused] * vault.VAULT_AUTH_ATTEMPTS, []))
+
+    success, env, token = vault.get_token()
+
+    assert success is False
+    assert len(session.posts) == 1
+
+
+def test_unavailable_login_is_retried(monkeypatch):
+    unavailable = response(503, {"errors": ["sealed"]})
+    session = use_session(monkeypatch, FakeSession([unavailable, login_response("t1")], []))
+
+    assert vault.get_token() == (True, "dev", "t1")
+    assert len(session.posts) == 2
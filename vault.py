@@ -1,37 +1,74 @@
 #!/usr/bin/env python3
 import json
 import os
+import random
 import time
 import requests
 import urllib3
 import sys
 import ejfile
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+#Login, secret and key requests share one session so the TLS handshake with Vault is done once per run
+#trust_env is off so HTTP(S)_PROXY from the environment is never picked up...otherwise requests try to go to Zscaler
+_VAULT_SESSION = requests.Session()
+_VAULT_SESSION.trust_env = False
+_VAULT_SESSION.verify = False
+#Token from the last successful login; reused until shortly before its lease runs out
+_TOKEN_CACHE = {'token': None, 'env': '', 'expires_at': 0}
+TOKEN_DEFAULT_LEASE = 300
+TOKEN_EXPIRY_MARGIN = 30
+#Login retries back off exponentially (0.25s, 0.5s, 1s, ... capped at 4s) with jitter
+VAULT_AUTH_ATTEMPTS = 5
+VAULT_BACKOFF_BASE = 0.25
+VAULT_BACKOFF_CAP = 4.0
  
 def print_json(j):
     print(json.dumps(j, indent=4, sort_keys=True))
  
-def try_vault_auth(location, url, token_request_data, proxies):
-    success = False
-    token = ''
-    count = 0
-    while count < 5:
-        count += 1
+def try_vault_auth(location, url, token_request_data):
+    #Returns (success, token, error); error describes the last failure when success is False
+    error = ''
+    for attempt in range(VAULT_AUTH_ATTEMPTS):
         try:
-            token_request = requests.post(url, data=token_request_data, proxies=proxies, verify=False, timeout=10)
-            if token_request.status_code in [200, 204]:
-                token = token_request.json()['auth']['client_token']
-                success = True
-                return success, token
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-        time.sleep(2)
-    errmsg = f"Call to Vault for token failed 5 times with error: {token_request.status_code}, returned data: {token_request.json()}"
-    return success, errmsg
+            token_request = _VAULT_SESSION.post(url, data=token_request_data, timeout=10)
+            token_request.raise_for_status()
+            auth = token_request.json()['auth']
+            token = auth['client_token']
+            _TOKEN_CACHE['token'] = token
+            _TOKEN_CACHE['env'] = location
+            _TOKEN_CACHE['expires_at'] = time.monotonic() + (auth.get('lease_duration') or TOKEN_DEFAULT_LEASE)
+            return True, token, ''
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = f"Request failed: {e}"
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code
+            error = f"Vault returned {status}: {e.response.text}"
+            #A 4xx other than 429 means the login itself was refused; retrying will not change that
+            if status < 500 and status != 429:
+                print(error)
+                return False, None, error
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            error = f"Unexpected response from Vault: {e}"
+            print(error)
+            return False, None, error
+        print(error)
+        if attempt < VAULT_AUTH_ATTEMPTS - 1:
+            time.sleep(min(VAULT_BACKOFF_BASE * 2 ** attempt, VAULT_BACKOFF_CAP) + random.uniform(0, VAULT_BACKOFF_BASE))
+    return False, None, f"Call to Vault for token failed {VAULT_AUTH_ATTEMPTS} times: {error}"
+ 
+ 
+def invalidate_token():
+    #Forget the cached token, e.g. after Vault rejects it with a 403
+    _TOKEN_CACHE['token'] = None
+    _TOKEN_CACHE['expires_at'] = 0
  
  
 def get_token():
     #We must login to Vault and receive a token that will allow us to retrieve Secrets
+    #A token from an earlier login in this run is reused while its lease is still valid
+    if _TOKEN_CACHE['token'] and time.monotonic() < _TOKEN_CACHE['expires_at'] - TOKEN_EXPIRY_MARGIN:
+        return True, _TOKEN_CACHE['env'], _TOKEN_CACHE['token']
     #Assign value of SA_TOKEN env var to local var
     success = False
     token = ''
@@ -41,66 +78,70 @@ def get_token():
         env = os.environ.get("ENVIRONMENT")
         #Define data for token request
         token_request_data = {"jwt": sa_token, "role": "ips-illumio-pipeline-integration-mapping"}
-        #Define proxies for token request...without this, request tries to go to Zscaler
-        proxies = {"http": None,"https": None}
         #Send request to Vault to get token for aporetosdp user
         if env == "prod":
             stl_url = os.environ.get("STL_VAULT_LOGIN")
             phx_url = os.environ.get("PHX_VAULT_LOGIN")
-            temp_success, token = try_vault_auth(env, stl_url, token_request_data, proxies)
+            temp_success, token, error = try_vault_auth(env, stl_url, token_request_data)
             if temp_success:
                 success = True
             else:
-                temp_success, token = try_vault_auth(env, phx_url, token_request_data, proxies)
+                temp_success, token, error = try_vault_auth(env, phx_url, token_request_data)
                 if temp_success:
                     success = True
             if not success:
-                print('Vault is inaccessible')
+                print('Vault is inaccessible: ' + error)
         else:
             url = os.environ.get("VAULT_LOGIN")
-            temp_success, token = try_vault_auth(env, url, token_request_data, proxies)
+            temp_success, token, error = try_vault_auth(env, url, token_request_data)
             if temp_success:
                 success = True
             if not success:
-                print('Vault is inaccessible')
+                print('Vault is inaccessible: ' + error)
     else:
         print('Required environment variables are missing')
     return success, env, token
  
  
+def get_secret(url, token, timeout):
+    #GET a Secret with the given token
+    #A cached token can be revoked before its lease runs out; on a 403 we log in again once and retry
+    secret_request = _VAULT_SESSION.get(url, headers={"X-Vault-Token": token}, timeout=timeout)
+    if secret_request.status_code == 403:
+        invalidate_token()
+        success, env, token = get_token()
+        if success:
+            secret_request = _VAULT_SESSION.get(url, headers={"X-Vault-Token": token}, timeout=timeout)
+    return secret_request
+ 
+ 
 def get_pce_secrets():
     #Now that we have our token, we can make requests for the Secrets
     success, env, token = get_token()
     if success:
-        #Define header with token value to retrieve Secrets
-        headers = {"X-Vault-Token": token}
-        #Define proxies for token request...without this, request tries to go to Zscaler
-        proxies = {"http": None,"https": None}
         #Define list name that contains Prisma Cert/Key values
         #Retrieve secrets for dev, uat, and prod prisma consoles
         if "PCE_CREDS" in os.environ:
             url = os.environ.get("PCE_CREDS")
             try:
-                pce_cred_request = requests.get(url, headers=headers, proxies=proxies, verify=False, timeout=5)
-                if not pce_cred_request.json()['data']['api_user']:
-                    print('PCE API key was not retrieved')
-                    if not pce_cred_request.json()['data']['api_key']:
+                pce_cred_request = get_secret(url, token, 5)
+                body = pce_cred_request.json()
+                data = body.get('data') or {}
+                api_user = data.get('api_user')
+                api_key = data.get('api_key')
+                if not api_user or not api_key:
+                    if not api_user:
+                        print('PCE API key was not retrieved')
+                    if not api_user and not api_key:
                         print('Cannot retrieve Secrets from Prod or Clone')
-                        sys.exit(1)
-                    else:
+                    elif not api_user:
                         print('PCE API key value is missing but PCE API token value was retrieved')
-                        sys.exit(1)
-                else:
-                    api_user = pce_cred_request.json()['data']['api_user']
-                    api_user = cleanup_creds(api_user)
-                   
-                    if not pce_cred_request.json()['data']['api_key']:
-                        print('PCE API key was retrieved but PCE API token value is missing')
-                        sys.exit(1)
                     else:
-                        api_key = pce_cred_request.json()['data']['api_key']
-                        api_key = cleanup_creds(api_key)
-                        success = True          
+                        print('PCE API key was retrieved but PCE API token value is missing')
+                    sys.exit(1)
+                api_user = cleanup_creds(api_user)
+                api_key = cleanup_creds(api_key)
+                success = True
             except Exception as ex:
                 print('Cannot retrieve Secrets from Vault')
                 print(ex)
@@ -119,22 +160,18 @@ def get_auth_key():
     key = ""
     success, env, token = get_token()
     if success:
-        #Define header with token value to retrieve Secrets
-        headers = {"X-Vault-Token": token}
-        #Define proxies for token request...without this, request tries to go to Zscaler
-        proxies = {"http": None,"https": None}
         #Define list name that contains Prisma Cert/Key values
         #Retrieve secrets for dev, uat, and prod prisma consoles
         if "SDP_KEY" in os.environ:
             url = os.environ.get("SDP_KEY")
             try:
-                sdp_key_request = requests.get(url, headers=headers, proxies=proxies, verify=False, timeout=10)
-                if not sdp_key_request.json()['data']['key']:
+                sdp_key_request = get_secret(url, token, 10)
+                sdp_key = (sdp_key_request.json().get('data') or {}).get('key')
+                if not sdp_key:
                     message = 'SDP Auth key was not retrieved.  It may not exist in Vault.'
                 else:
-                    sdp_key = sdp_key_request.json()['data']['key']
                     key = cleanup_creds(sdp_key)
-                    success = True          
+                    success = True
             except Exception as ex:
                 print('Cannot retrieve Secrets from Vault')
                 print(ex)